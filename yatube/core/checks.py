@@ -0,0 +1,26 @@
+"""Проверки настроек, без которых кэш не годится для продакшена.
+
+Сессии, пользователи, счётчики лимитов и индексы подписок сбрасываются
+в кэше одним процессом, а читаются всеми. С кэшем в памяти процесса
+выход, смена пароля или лимит действуют только в одном воркере
+gunicorn, поэтому manage.py check --deploy требует общий кэш.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'Кэш по умолчанию ({backend}) живёт в памяти одного процесса.',
+        hint='Задайте YATUBE_CACHE_LOCATION с адресом memcached.',
+        id='core.E001',
+    )]
@@ -0,0 +1,58 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+def read_session(request):
+    request.session.get('_auth_user_id')
+    return HttpResponse()
+
+
+def measure(engine, requests):
+    """Среднее время и число запросов к базе на один HTTP-запрос."""
+    with override_settings(SESSION_ENGINE=engine):
+        store = import_module(engine).SessionStore()
+        store['_auth_user_id'] = '1'
+        store.save()
+        middleware = SessionMiddleware(read_session)
+        factory = RequestFactory()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(requests):
+                request = factory.get('/')
+                request.COOKIES[settings.SESSION_COOKIE_NAME] = (
+                    store.session_key
+                )
+                middleware(request)
+            elapsed = time.perf_counter() - started
+        store.delete()
+    return elapsed / requests, len(queries) / requests
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает накладные расходы движков сессий на один запрос.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for engine in ENGINES:
+            per_request, queries = measure(engine, options['requests'])
+            self.stdout.write(
+                f'{engine.rsplit(".", 1)[-1]}: '
+                f'{per_request * 1e6:.0f} мкс, '
+                f'запросов к базе: {queries:.2f}'
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.sessions import CLEANUP_BATCH_SIZE, clear_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные сессии пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=CLEANUP_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        deleted = clear_expired_sessions(options['batch_size'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
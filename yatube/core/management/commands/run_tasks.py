@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.taskqueue import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры фоновой очереди задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Сколько процессов-воркеров запустить.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        # SIGTERM и SIGINT не убивают воркеры посреди задачи, а просят
+        # их выйти после текущей пачки; родитель ждёт, пока все выйдут.
+        stop = multiprocessing.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop.set())
+        if options['processes'] == 1:
+            self.work(options['poll'], options['burst'], stop)
+            return
+        # Соединения с базой нельзя делить между процессами.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=self.work,
+                args=(options['poll'], options['burst'], stop)
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def work(self, poll, burst, stop):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop.set())
+        while not stop.is_set():
+            done = run_pending(limit=100)
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            elif burst:
+                break
+            else:
+                stop.wait(poll)
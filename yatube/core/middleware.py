@@ -0,0 +1,53 @@
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.utils._os import safe_join
+
+from .storage import manifest_hashed_names
+from .utils import serve_file
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+SHORT_CACHE = 'public, max-age=60'
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику без nginx.
+
+    Файлы с хэшем в имени кэшируются браузером на год, остальные —
+    на минуту. Если файла нет в STATIC_ROOT, запрос идёт дальше.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or not settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        self.hashed_names = manifest_hashed_names(self.root)
+
+    def __call__(self, request):
+        response = None
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    def serve(self, request):
+        name = posixpath.normpath(
+            request.path_info[len(self.prefix):]
+        ).lstrip('/')
+        try:
+            fullpath = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(fullpath):
+            return None
+        if name in self.hashed_names:
+            cache_control = IMMUTABLE_CACHE
+        else:
+            cache_control = SHORT_CACHE
+        return serve_file(request, fullpath, cache_control, compressed=True)
@@ -0,0 +1,101 @@
+"""Ограничение частоты запросов на запись.
+
+Лимиты задаются в RATELIMITS по имени view: отдельно для пользователя
+и для IP, строкой вида '20/m'. Счётчик — ключ в кэше на текущее окно:
+cache.add заводит его, cache.incr увеличивает. Общим для всех
+процессов и атомарным счётчик становится только в memcached (его
+требует core.E001); в кэше процесса каждый воркер считает сам.
+
+За обратным прокси REMOTE_ADDR у всех клиентов один — адрес прокси.
+Тогда адрес клиента берётся из заголовка RATELIMIT_IP_HEADER, но
+только у запросов, пришедших с адресов RATELIMIT_TRUSTED_PROXIES:
+иначе клиент подставил бы в заголовок любой адрес сам.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+DEFAULT_METHODS = ('POST',)
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    header = settings.RATELIMIT_IP_HEADER
+    if not header or remote_addr not in settings.RATELIMIT_TRUSTED_PROXIES:
+        return remote_addr
+    # В X-Forwarded-For доверенный прокси дописывает адрес в конец.
+    forwarded = request.META.get(header, '').split(',')[-1].strip()
+    return forwarded or remote_addr
+
+
+def hit(name, ident, rate, now=None):
+    """Учитывает запрос; возвращает 0 или сколько секунд ждать."""
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window = int(now // period)
+    key = f'ratelimit:{name}:{ident}:{window}'
+    cache.add(key, 0, period)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Ключ успели вытеснить между add и incr.
+        cache.add(key, 1, period)
+        count = 1
+    if count <= limit:
+        return 0
+    return int((window + 1) * period - now) + 1
+
+
+def check(request, name, rules):
+    methods = rules.get('methods', DEFAULT_METHODS)
+    if request.method not in methods:
+        return 0
+    waits = []
+    if rules.get('user') and request.user.is_authenticated:
+        waits.append(hit(name, f'user:{request.user.pk}', rules['user']))
+    if rules.get('ip'):
+        waits.append(hit(name, f'ip:{client_ip(request)}', rules['ip']))
+    return max(waits, default=0)
+
+
+def ratelimit(name, **rules):
+    """Декоратор для view, которых нет в RATELIMITS."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            retry_after = check(request, name, rules)
+            if retry_after:
+                return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Применяет RATELIMITS к view по их имени в urls."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        rules = settings.RATELIMITS.get(name)
+        if rules is None:
+            return None
+        retry_after = check(request, name, rules)
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        return None
@@ -0,0 +1,27 @@
+"""Хранение сессий.
+
+Сессии лежат в cached_db: запрос читает их из общего кэша, а в базу
+идёт только при промахе и при записи. Кэш должен быть общим для всех
+процессов (memcached, см. core.checks), иначе выход из аккаунта
+сбросит сессию только в одном воркере. Записываются сессии лишь при
+изменении данных (SESSION_SAVE_EVERY_REQUEST = False). Просроченные
+строки удаляются пачками, чтобы не держать долгую блокировку таблицы.
+"""
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+CLEANUP_BATCH_SIZE = 1000
+
+
+def clear_expired_sessions(batch_size=CLEANUP_BATCH_SIZE, now=None):
+    """Удаляет просроченные сессии, возвращает их количество."""
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(
+            expire_date__lt=now
+        ).values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        Session.objects.filter(session_key__in=keys).delete()
+        deleted += len(keys)
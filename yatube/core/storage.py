@@ -0,0 +1,61 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.xml', '.json', '.html',
+)
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_file(path):
+    """Кладёт рядом с файлом сжатые копии .gz и .br (если есть brotli)."""
+    with open(path, 'rb') as source:
+        content = source.read()
+    if len(content) < MIN_COMPRESS_SIZE:
+        return
+    variants = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress))
+    for suffix, compress in variants:
+        compressed = compress(content)
+        # Сжатая копия, которая не меньше оригинала, только мешает.
+        if len(compressed) >= len(content):
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэширует имена статики в манифесте и сжимает её заранее."""
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in names:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress_file(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файл не собран через collectstatic: отдаём имя как есть.
+            return name
+
+
+def manifest_hashed_names(root):
+    """Имена файлов с хэшем из манифеста, собранного в root."""
+    if not root or not os.path.isdir(root):
+        return set()
+    storage = CompressedManifestStaticFilesStorage(location=root)
+    return set(storage.hashed_files.values())
@@ -0,0 +1,175 @@
+"""Фоновая очередь задач в базе данных, без внешнего брокера.
+
+Задачи объявляются декоратором @task в модулях tasks.py приложений
+и ставятся в очередь через enqueue() или func.delay(). Воркеры
+(команда run_tasks) захватывают задачу атомарным UPDATE на время
+TASK_VISIBILITY_TIMEOUT: если воркер упал, задачу по истечении
+таймаута заберёт другой, если у задачи остались попытки; задача, чей
+воркер упал на последней попытке, помечается failed. Неудачные задачи
+перезапускаются с экспоненциальной задержкой, после max_attempts
+остаются со статусом failed.
+"""
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+_current = threading.local()
+CLAIM_CANDIDATES = 10
+MAX_RETRY_DELAY = 60 * 60
+
+
+class LockLost(Exception):
+    """Блокировку задачи успел забрать другой воркер."""
+
+
+def task(func=None, *, name=None, max_attempts=5):
+    """Регистрирует функцию как задачу и добавляет ей метод delay()."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = func
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+
+        def delay(countdown=0, **kwargs):
+            return enqueue(task_name, countdown=countdown, **kwargs)
+
+        func.delay = delay
+        return func
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def enqueue(name, countdown=0, **kwargs):
+    """Ставит задачу в очередь; аргументы должны сериализоваться в JSON."""
+    func = registry[name]
+    if settings.TASK_QUEUE_EAGER:
+        func(**kwargs)
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps(kwargs),
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=countdown)
+    )
+
+
+def _ready(now):
+    return (
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(
+            status=Task.RUNNING, locked_until__lt=now,
+            attempts__lt=F('max_attempts')
+        )
+    )
+
+
+def fail_abandoned(now):
+    """Помечает failed задачи, воркер которых умер на последней попытке."""
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts')
+    ).update(
+        status=Task.FAILED,
+        last_error='Воркер не вернул результат до истечения блокировки.'
+    )
+
+
+def claim(now=None):
+    """Захватывает одну готовую задачу или возвращает None."""
+    now = now or timezone.now()
+    fail_abandoned(now)
+    locked_until = now + timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT)
+    candidates = Task.objects.filter(_ready(now)).order_by(
+        'run_at'
+    ).values_list('pk', flat=True)[:CLAIM_CANDIDATES]
+    for pk in candidates:
+        claimed = Task.objects.filter(_ready(now), pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=locked_until,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def extend_lock(now=None):
+    """Продлевает блокировку выполняемой задачи ещё на таймаут.
+
+    Долгие задачи вызывают её между пачками, чтобы их не забрал второй
+    воркер. Если блокировку уже забрали, бросает LockLost: продолжать
+    нельзя, задачу выполняет другой. Вне воркера ничего не делает.
+    """
+    job = getattr(_current, 'job', None)
+    if job is None:
+        return
+    now = now or timezone.now()
+    locked_until = now + timedelta(seconds=settings.TASK_VISIBILITY_TIMEOUT)
+    if not Task.objects.filter(
+        pk=job.pk, locked_until=job.locked_until
+    ).update(locked_until=locked_until):
+        raise LockLost
+    job.locked_until = locked_until
+
+
+def retry_delay(attempts):
+    return min(
+        settings.TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY
+    )
+
+
+def execute(job):
+    """Выполняет захваченную задачу и сохраняет результат.
+
+    Результат записывается, только если задача всё ещё за этим
+    воркером: после истечения таймаута её мог забрать другой.
+    """
+    _current.job = job
+    try:
+        func = registry[job.name]
+        func(**json.loads(job.payload))
+    except Exception:
+        owned = Task.objects.filter(pk=job.pk, locked_until=job.locked_until)
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s упала', job.name, job.pk)
+        if job.attempts >= job.max_attempts:
+            owned.update(status=Task.FAILED, last_error=error)
+        else:
+            owned.update(
+                status=Task.QUEUED,
+                locked_until=None,
+                last_error=error,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts)
+                )
+            )
+        return False
+    finally:
+        _current.job = None
+    Task.objects.filter(pk=job.pk, locked_until=job.locked_until).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim()
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
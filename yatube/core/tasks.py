@@ -0,0 +1,7 @@
+from .sessions import clear_expired_sessions
+from .taskqueue import task
+
+
+@task(max_attempts=1)
+def clear_sessions():
+    clear_expired_sessions()
@@ -1,5 +1,31 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
 from multiprocessing.connection import Client
-from django.test import Client, TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .checks import check_shared_cache
+from .models import Task
+from .ratelimit import client_ip, hit, ratelimit
+from .sessions import clear_expired_sessions
+from .storage import CompressedManifestStaticFilesStorage
+from .taskqueue import (
+    LockLost, claim, execute, extend_lock, run_pending, task
+)
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -11,3 +37,315 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source_dir = tempfile.mkdtemp()
+        cls.static_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source_dir, 'css'))
+        with open(os.path.join(cls.source_dir, 'css', 'site.css'), 'w') as f:
+            f.write('body { color: black; }\n' * 100)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.source_dir, ignore_errors=True)
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+
+    def collect(self):
+        with override_settings(
+            STATICFILES_DIRS=[self.source_dir],
+            STATIC_ROOT=self.static_root,
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            storage = CompressedManifestStaticFilesStorage(
+                location=self.static_root
+            )
+            return storage.stored_name('css/site.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic создаёт хэшированные и сжатые копии."""
+        hashed = self.collect()
+        self.assertNotEqual(hashed, 'css/site.css')
+        path = os.path.join(self.static_root, hashed)
+        self.assertTrue(os.path.isfile(path))
+        self.assertTrue(os.path.isfile(path + '.gz'))
+
+    def test_middleware_serves_hashed_file(self):
+        """Хэшированный файл отдаётся сжатым и кэшируется надолго."""
+        hashed = self.collect()
+        with override_settings(STATIC_ROOT=self.static_root):
+            response = Client().get(
+                '/static/' + hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_middleware_skips_missing_file(self):
+        """Несобранный файл не перехватывается middleware."""
+        with override_settings(STATIC_ROOT=self.static_root):
+            response = Client().get('/static/css/missing.css')
+        self.assertEqual(response.status_code, 404)
+
+
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.media_root, 'posts'))
+        with open(os.path.join(cls.media_root, 'posts', 'a.jpg'), 'wb') as f:
+            f.write(bytes(range(100)))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def get(self, **headers):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            return self.client.get('/media/posts/a.jpg', **headers)
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с заголовками кэширования."""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content), bytes(range(100))
+        )
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_range(self):
+        """Запрос Range отдаёт только нужный кусок файла."""
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(
+            b''.join(response.streaming_content), bytes(range(10, 20))
+        )
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла возвращает 416."""
+        response = self.get(HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_not_modified(self):
+        """If-Modified-Since с актуальной датой возвращает 304."""
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_x_accel_redirect(self):
+        """В режиме x-accel файл пересылает nginx."""
+        with override_settings(MEDIA_SERVE_MODE='x-accel'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.jpg'
+        )
+
+    def test_path_outside_media_root(self):
+        """Путь за пределами MEDIA_ROOT не отдаётся."""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get('/media/../settings.py')
+        self.assertEqual(response.status_code, 404)
+
+
+calls = []
+
+
+@task(name='core.tests.record', max_attempts=2)
+def record(value):
+    if value == 'fail':
+        raise RuntimeError('не получилось')
+    calls.append(value)
+
+
+@task(name='core.tests.long_job', max_attempts=1)
+def long_job():
+    later = timezone.now() + timedelta(
+        seconds=settings.TASK_VISIBILITY_TIMEOUT + 1
+    )
+    extend_lock(now=later)
+    calls.append(claim(now=later))
+    Task.objects.update(locked_until=None)
+    try:
+        extend_lock()
+    except LockLost:
+        calls.append('lost')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_task_runs(self):
+        """Поставленная задача выполняется воркером и удаляется."""
+        record.delay(value='ok')
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ['ok'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается и после лимита попыток помечается."""
+        record.delay(value='fail')
+        run_pending()
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        job.run_at = timezone.now()
+        job.save()
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertIn('не получилось', job.last_error)
+
+    def test_expired_lock_reclaimed(self):
+        """Задачу зависшего воркера забирают после таймаута."""
+        record.delay(value='ok')
+        self.assertIsNotNone(claim())
+        self.assertIsNone(claim())
+        later = timezone.now() + timedelta(
+            seconds=settings.TASK_VISIBILITY_TIMEOUT + 1
+        )
+        self.assertIsNotNone(claim(now=later))
+
+    def test_long_job_extends_lock(self):
+        """Продлённую блокировку не забирают, чужую продлить нельзя."""
+        long_job.delay()
+        execute(claim())
+        self.assertEqual(calls, [None, 'lost'])
+
+    def test_abandoned_last_attempt_failed(self):
+        """Задача, убившая воркер на последней попытке, не крутится вечно."""
+        record.delay(value='ok')
+        Task.objects.update(max_attempts=1)
+        self.assertIsNotNone(claim())
+        later = timezone.now() + timedelta(
+            seconds=settings.TASK_VISIBILITY_TIMEOUT + 1
+        )
+        self.assertIsNone(claim(now=later))
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(calls, [])
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_mode(self):
+        """В режиме TASK_QUEUE_EAGER задача выполняется сразу."""
+        record.delay(value='now')
+        self.assertEqual(calls, ['now'])
+        self.assertFalse(Task.objects.exists())
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_session_read_from_cache(self):
+        """Сессия вошедшего пользователя читается без запроса к базе."""
+        user = User.objects.create_user(username='user')
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/about/author/')
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ])
+
+    def test_clear_expired_sessions(self):
+        """Просроченные сессии удаляются пачками, живые остаются."""
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(
+                session_key=f'old{i}',
+                session_data='',
+                expire_date=now - timedelta(days=1)
+            )
+        Session.objects.create(
+            session_key='alive',
+            session_data='',
+            expire_date=now + timedelta(days=1)
+        )
+        self.assertEqual(clear_expired_sessions(batch_size=2), 5)
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive']
+        )
+
+    def test_deploy_requires_shared_cache(self):
+        """check --deploy не пропускает кэш в памяти процесса."""
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['core.E001']
+        )
+        memcached = {'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+        }}
+        with self.settings(CACHES=memcached):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(RATELIMITS={
+    'posts:post_create': {'user': '2/m', 'ip': '100/m'},
+    'users:signup': {'ip': '1/h'},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user')
+        self.client.force_login(self.user)
+
+    def test_user_limit(self):
+        """Сверх лимита пользователь получает 429 с Retry-After."""
+        url = reverse('posts:post_create')
+        for _ in range(2):
+            response = self.client.post(url, {'text': 'пост'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {'text': 'пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_ip_limit(self):
+        """Лимит по IP действует и для анонимов."""
+        url = reverse('users:signup')
+        self.client.logout()
+        self.client.post(url, {})
+        self.assertEqual(self.client.post(url, {}).status_code, 429)
+
+    @override_settings(RATELIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_client_ip_behind_proxy(self):
+        """За доверенным прокси адрес клиента берётся из заголовка."""
+        factory = RequestFactory()
+        proxied = factory.post(
+            '/', REMOTE_ADDR='127.0.0.1',
+            HTTP_X_FORWARDED_FOR='6.6.6.6, 10.0.0.7'
+        )
+        self.assertEqual(client_ip(proxied), '10.0.0.7')
+        direct = factory.post(
+            '/', REMOTE_ADDR='10.0.0.8', HTTP_X_FORWARDED_FOR='6.6.6.6'
+        )
+        self.assertEqual(client_ip(direct), '10.0.0.8')
+        self.assertEqual(
+            client_ip(factory.post('/', REMOTE_ADDR='127.0.0.1')),
+            '127.0.0.1'
+        )
+
+    def test_window_resets(self):
+        """В следующем окне счётчик начинается заново."""
+        self.assertEqual(hit('view', 'ip:1', '1/m', now=0), 0)
+        self.assertEqual(hit('view', 'ip:1', '1/m', now=30), 31)
+        self.assertEqual(hit('view', 'ip:1', '1/m', now=60), 0)
+
+    def test_decorator(self):
+        """Декоратор ограничивает view без записи в RATELIMITS."""
+        view = ratelimit('test', ip='1/m')(lambda request: HttpResponse())
+        request = RequestFactory().post('/')
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(view(request).status_code, 429)
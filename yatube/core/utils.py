@@ -0,0 +1,109 @@
+import mimetypes
+import os
+import re
+
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse
+)
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return {
+        part.split(';')[0].strip().lower()
+        for part in header.split(',') if part.strip()
+    }
+
+
+def parse_range(header, size):
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает (start, end) включительно, None для отсутствующего или
+    неподдерживаемого заголовка и False для невыполнимого диапазона.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(BLOCK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, fullpath, cache_control, compressed=False):
+    """Отдаёт файл с диска с заголовками кэширования.
+
+    При compressed=True выбирает заранее сжатую копию рядом с файлом
+    по Accept-Encoding клиента, иначе поддерживает запросы Range.
+    Целый файл отдаётся через FileResponse, и WSGI-сервер может
+    переслать его через sendfile.
+    """
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    path = fullpath
+    encoding = None
+    if compressed:
+        accepted = accepted_encodings(request)
+        for name, suffix in ENCODINGS:
+            if name in accepted and os.path.isfile(fullpath + suffix):
+                path, encoding = fullpath + suffix, name
+                break
+    statobj = os.stat(path)
+    size = statobj.st_size
+    byte_range = None
+    if not compressed:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), statobj.st_mtime, size
+    ):
+        response = HttpResponseNotModified()
+    elif byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%d' % size
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(path, start, end - start + 1),
+            status=206, content_type=content_type
+        )
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+        response['Content-Length'] = end - start + 1
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Content-Length'] = size
+    response['Last-Modified'] = http_date(statobj.st_mtime)
+    response['Cache-Control'] = cache_control
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if compressed:
+        response['Vary'] = 'Accept-Encoding'
+    else:
+        response['Accept-Ranges'] = 'bytes'
+    return response
@@ -1,4 +1,15 @@
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+
+from .utils import serve_file
 
 
 def page_not_found(request, exception):
@@ -18,3 +29,55 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def serve_media(request, path):
+    """Отдаёт загруженные файлы в production.
+
+    Режим задаёт MEDIA_SERVE_MODE: 'sendfile' — файл отдаёт Django
+    (через wsgi.file_wrapper), 'x-accel' и 'x-sendfile' — только
+    заголовок, а сам файл пересылает nginx или apache.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    if name.startswith(settings.THUMBNAIL_PREFIX):
+        # Имена миниатюр sorl содержат хэш, и их содержимое не меняется.
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = 'public, max-age=%d' % settings.MEDIA_CACHE_MAX_AGE
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == 'sendfile':
+        return serve_file(request, fullpath, cache_control)
+    response = HttpResponse(
+        content_type=mimetypes.guess_type(fullpath)[0] or ''
+    )
+    if mode == 'x-accel':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(name)
+        )
+    else:
+        response['X-Sendfile'] = fullpath
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def serve_sitemap(request, name):
+    """Отдаёт заранее собранные файлы sitemap из SITEMAP_ROOT."""
+    fullpath = os.path.join(settings.SITEMAP_ROOT, name)
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return serve_file(request, fullpath, 'public, max-age=3600')
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html',
+        {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -1,21 +1,93 @@
 from django.contrib import admin
+from django.db import connections
 
 from .models import Comment, Follow, Group, Post
+from .utils import EstimatedCountPaginator
+
+SEARCH_CONFIG = 'russian'
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
+    # DateFieldListFilter не делает запросов: его пункты — фиксированные
+    # диапазоны дат, каждый из которых читается по индексу pub_date.
     list_filter = ('pub_date',)
+    # Годы и месяцы строит indexed_date_hierarchy по MIN/MAX, см.
+    # admin/posts/post/change_list.html.
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        # Правка текста в админке тоже попадает в историю версий.
+        obj._editor = request.user
+        super().save_model(request, obj, form, change)
+
+    def get_changelist_formset(self, request, **kwargs):
+        request.in_changelist = True
+        return super().get_changelist_formset(request, **kwargs)
+
+    def get_autocomplete_fields(self, request):
+        # В списке группа правится обычным select: автодополнение
+        # делало бы по запросу на строку ради подписи выбранной группы.
+        if getattr(request, 'in_changelist', False):
+            return ()
+        return super().get_autocomplete_fields(request)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """В списке варианты групп читаются один раз на всю страницу."""
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group' and getattr(
+            request, 'in_changelist', False
+        ):
+            field.choices = list(field.choices)
+        return field
+
+    def get_search_results(self, request, queryset, search_term):
+        """На PostgreSQL ищет по полнотекстовому индексу post_text_search.
+
+        На других базах остаётся обычный поиск по вхождению.
+        """
+        if not search_term or connections[queryset.db].vendor != (
+            'postgresql'
+        ):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        queryset = queryset.annotate(
+            search=SearchVector('text', config=SEARCH_CONFIG)
+        ).filter(search=SearchQuery(search_term, config=SEARCH_CONFIG))
+        return queryset, False
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    date_hierarchy = 'created'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author', 'following_date')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,382 @@
+"""Архив старых постов в сжатых файлах по месяцам.
+
+Посты старше отсечки вместе с комментариями переносятся в файлы
+ARCHIVE_ROOT/<ГГГГ-ММ>.jsonl.gz. Файлы только дописываются: каждый
+запуск добавляет в конец отдельный gzip-фрагмент, а ArchivedPost хранит
+для поста поколение файла, смещение и длину фрагмента. rewrite_month
+пишет файл следующего поколения, и он становится текущим в той же
+транзакции, что и новые смещения. Чтение — один seek и распаковка
+одного фрагмента, горячая таблица Post при этом остаётся маленькой.
+
+Вместе с постом в запись попадают комментарии, история правок и
+упомянутые пользователи. Производные строки — TaggedPost, TrendingPost
+и уведомления о посте — удаляются: архивный пост не участвует в лентах
+тегов и в трендах, а уведомлениям годичной давности не место во
+входящих. Комментарии и правки удалённых пользователей при чтении
+пропускаются, как и сами посты удалённого автора.
+"""
+import gzip
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from .deletion import raw_delete
+from .feeds import invalidate_post_feeds
+from .groups import invalidate_group_feed, post_removed
+from .models import (
+    ArchiveMonth, ArchivedPost, Comment, Group, Mention, Post, PostRevision,
+    User
+)
+from .signals import release_image
+
+BATCH_SIZE = 500
+FILE_NAME = '{}.jsonl.gz'
+GENERATION_FILE_NAME = '{}.{}.jsonl.gz'
+
+
+def archive_path(month, generation=0):
+    if generation:
+        name = GENERATION_FILE_NAME.format(month, generation)
+    else:
+        name = FILE_NAME.format(month)
+    return os.path.join(settings.ARCHIVE_ROOT, name)
+
+
+def lock_month(month):
+    """Блокирует месяц архива и возвращает его ArchiveMonth.
+
+    Вызывать в транзакции: append_chunk и rewrite_month одного месяца
+    под этой блокировкой идут строго по очереди.
+    """
+    ArchiveMonth.objects.get_or_create(month=month)
+    return ArchiveMonth.objects.select_for_update().get(month=month)
+
+
+def serialize(post, comments, revisions, mentions):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author_id': post.author_id,
+        'group_id': post.group_id,
+        'image': post.image.name or '',
+        'comments': [{
+            'id': comment.pk,
+            'author_id': comment.author_id,
+            'text': comment.text,
+            'created': comment.created.isoformat(),
+        } for comment in comments],
+        'revisions': [{
+            'number': revision.number,
+            'editor_id': revision.editor_id,
+            'created': revision.created.isoformat(),
+            'is_snapshot': revision.is_snapshot,
+            'data': revision.data,
+        } for revision in revisions],
+        'mentions': mentions,
+    }
+
+
+def append_chunk(month, generation, records):
+    """Дописывает gzip-фрагмент в файл месяца, возвращает (offset, length)."""
+    os.makedirs(settings.ARCHIVE_ROOT, exist_ok=True)
+    data = gzip.compress(''.join(
+        json.dumps(record, ensure_ascii=False) + '\n' for record in records
+    ).encode())
+    with open(archive_path(month, generation), 'ab') as archive:
+        offset = archive.tell()
+        archive.write(data)
+        archive.flush()
+        os.fsync(archive.fileno())
+    return offset, len(data)
+
+
+def read_chunk(month, generation, offset, length):
+    with open(archive_path(month, generation), 'rb') as archive:
+        archive.seek(offset)
+        data = gzip.decompress(archive.read(length))
+    return {
+        record['id']: record
+        for record in map(json.loads, data.decode().splitlines())
+    }
+
+
+def delete_hot_posts(ids, comment_ids):
+    """Удаляет посты без сигналов: картинки и счётчики групп остаются.
+
+    Картинки нужны архивным записям, а пост в архиве по-прежнему
+    считается постом группы. Комментарии удаляются только прочитанные:
+    комментарий, добавленный после чтения, не даст удалить пост.
+    """
+    raw_delete(Comment, comment_ids)
+    raw_delete(Post, ids, keep=(Comment,))
+
+
+def archive_batch(posts):
+    """Переносит посты в архив, возвращает число перенесённых.
+
+    Посты перечитываются под select_for_update, и всё, что попадает в
+    запись архива, читается в той же транзакции, что и удаление.
+    """
+    entries = []
+    with transaction.atomic():
+        posts = list(Post.objects.filter(
+            pk__in=[post.pk for post in posts]
+        ).select_for_update().order_by('pub_date', 'pk'))
+        if not posts:
+            return 0
+        comments = defaultdict(list)
+        comment_ids = []
+        for comment in Comment.all_objects.filter(
+            post__in=posts
+        ).order_by('created', 'pk'):
+            comment_ids.append(comment.pk)
+            if not comment.is_deleted:
+                comments[comment.post_id].append(comment)
+        revisions = defaultdict(list)
+        for revision in PostRevision.objects.filter(post__in=posts):
+            revisions[revision.post_id].append(revision)
+        mentions = defaultdict(list)
+        for post_id, user_id in Mention.objects.filter(
+            post__in=posts
+        ).values_list('post_id', 'user_id'):
+            mentions[post_id].append(user_id)
+        by_month = defaultdict(list)
+        for post in posts:
+            by_month[post.pub_date.strftime('%Y-%m')].append(post)
+        for month, month_posts in sorted(by_month.items()):
+            generation = lock_month(month).generation
+            offset, length = append_chunk(month, generation, [
+                serialize(
+                    post, comments[post.pk], revisions[post.pk],
+                    mentions[post.pk]
+                ) for post in month_posts
+            ])
+            entries.extend(ArchivedPost(
+                post_id=post.pk,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                pub_date=post.pub_date,
+                month=month,
+                generation=generation,
+                offset=offset,
+                length=length
+            ) for post in month_posts)
+        ArchivedPost.objects.bulk_create(entries)
+        delete_hot_posts([post.pk for post in posts], comment_ids)
+    for author_id in {post.author_id for post in posts}:
+        invalidate_post_feeds(author_id)
+    for group_id in {post.group_id for post in posts} - {None}:
+        invalidate_group_feed(group_id)
+    return len(posts)
+
+
+def archive_posts(before, batch_size=BATCH_SIZE):
+    """Переносит в архив посты, опубликованные раньше before."""
+    archived = 0
+    while True:
+        posts = list(Post.objects.filter(
+            pub_date__lt=before
+        ).order_by('pub_date', 'pk')[:batch_size])
+        if not posts:
+            return archived
+        try:
+            archived += archive_batch(posts)
+        except IntegrityError:
+            # К посту пачки успели добавить комментарий: читаем заново.
+            continue
+
+
+def read_records(entries):
+    """Записи архива для entries; каждый фрагмент читается один раз."""
+    records = {}
+    chunks = {
+        (entry.month, entry.generation, entry.offset, entry.length)
+        for entry in entries
+    }
+    for chunk in chunks:
+        records.update(read_chunk(*chunk))
+    return [records[entry.post_id] for entry in entries]
+
+
+def delete_archived(ids):
+    """Удаляет архивные посты, как _delete_posts удаляет горячие.
+
+    Архивный пост по-прежнему держит ссылку на картинку и учитывается в
+    счётчике группы, поэтому и то и другое снимается здесь. Возвращает
+    группы и картинки, файлы которых удаляет вызывающий. Сами записи
+    остаются в файле месяца до rewrite_month. Вызывать в транзакции:
+    строки блокируются, чтобы параллельный запуск не снял ссылки дважды.
+    """
+    entries = list(
+        ArchivedPost.objects.filter(post_id__in=ids).select_for_update()
+    )
+    ids = [entry.post_id for entry in entries]
+    live = Counter(
+        entry.group_id for entry in entries if entry.group_id is not None
+    )
+    images = [
+        record['image'] for record in read_records(entries)
+        if record['image']
+    ]
+    ArchivedPost.objects.filter(post_id__in=ids).delete()
+    for group_id, count in live.items():
+        post_removed(group_id, count)
+    for name in images:
+        release_image(name, purge=False)
+    return set(live), images
+
+
+def rewrite_month(month):
+    """Перепаковывает файл месяца без удалённых постов и пользователей.
+
+    Остальные записи переписываются теми же фрагментами в файл
+    следующего поколения. Он становится текущим в одной транзакции с
+    новыми смещениями, а старый файл удаляется после неё. Месяц
+    заблокирован на всё время, так что дописать в старый файл
+    параллельно нельзя. Операция редкая: её вызывает delete_user, а
+    месяцы, которые она переписывает, старше отсечки archive_posts.
+    """
+    with transaction.atomic():
+        state = lock_month(month)
+        old_path = archive_path(month, state.generation)
+        state.generation += 1
+        state.save(update_fields=('generation',))
+        transaction.on_commit(lambda: remove_file(old_path))
+        entries = list(ArchivedPost.objects.filter(month=month).order_by(
+            'generation', 'offset', 'post_id'
+        ))
+        if not entries:
+            return
+        records = read_records(entries)
+        user_ids = set()
+        for record in records:
+            user_ids.update(
+                comment['author_id'] for comment in record['comments']
+            )
+        users = set(User.objects.filter(
+            pk__in=user_ids
+        ).values_list('pk', flat=True))
+        chunks = defaultdict(list)
+        for entry, record in zip(entries, records):
+            record['comments'] = [
+                comment for comment in record['comments']
+                if comment['author_id'] in users
+            ]
+            chunks[entry.generation, entry.offset].append((entry, record))
+        with open(archive_path(month, state.generation), 'wb') as archive:
+            for chunk in chunks.values():
+                data = gzip.compress(''.join(
+                    json.dumps(record, ensure_ascii=False) + '\n'
+                    for _, record in chunk
+                ).encode())
+                offset = archive.tell()
+                archive.write(data)
+                for entry, _ in chunk:
+                    entry.generation = state.generation
+                    entry.offset, entry.length = offset, len(data)
+            archive.flush()
+            os.fsync(archive.fileno())
+        ArchivedPost.objects.bulk_update(
+            entries, ('generation', 'offset', 'length')
+        )
+
+
+def remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def load(entries):
+    """Восстанавливает несохранённые Post с комментариями из архива.
+
+    Фрагменты читаются по одному разу, сколько бы постов из них ни
+    требовалось.
+    """
+    entries = list(entries)
+    records = read_records(entries)
+    user_ids = {record['author_id'] for record in records}
+    for record in records:
+        user_ids.update(
+            comment['author_id'] for comment in record['comments']
+        )
+        user_ids.update(
+            revision['editor_id']
+            for revision in record.get('revisions', ())
+        )
+    users = User.objects.in_bulk(user_ids - {None})
+    groups = Group.objects.in_bulk(
+        {record['group_id'] for record in records} - {None}
+    )
+    posts = []
+    for record in records:
+        if record['author_id'] not in users:
+            continue
+        post = Post(
+            id=record['id'],
+            text=record['text'],
+            pub_date=parse_datetime(record['pub_date']),
+            author=users[record['author_id']],
+            group=groups.get(record['group_id']),
+            image=record['image']
+        )
+        post.archived = True
+        post.archived_comments = [Comment(
+            id=comment['id'],
+            post=post,
+            author=users[comment['author_id']],
+            text=comment['text'],
+            created=parse_datetime(comment['created'])
+        ) for comment in record['comments'] if comment['author_id'] in users]
+        post.archived_revisions = [PostRevision(
+            post=post,
+            number=revision['number'],
+            editor=users.get(revision['editor_id']),
+            created=parse_datetime(revision['created']),
+            is_snapshot=revision['is_snapshot'],
+            data=revision['data']
+        ) for revision in record.get('revisions', ())]
+        post.archived_mentions = record.get('mentions', [])
+        posts.append(post)
+    return posts
+
+
+def get_archived_post(post_id):
+    entry = ArchivedPost.objects.filter(post_id=post_id).first()
+    posts = load([entry]) if entry else []
+    return posts[0] if posts else None
+
+
+class ProfilePosts:
+    """Посты автора для пагинатора: сначала горячие, затем архивные."""
+
+    def __init__(self, author):
+        self.hot = Post.objects.filter(author=author).select_related('group')
+        self.archived = ArchivedPost.objects.filter(author=author)
+
+    def count(self):
+        return self.hot_count + self.archived.count()
+
+    @property
+    def hot_count(self):
+        if not hasattr(self, '_hot_count'):
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        posts = list(self.hot[start:stop])
+        if stop is None or stop > self.hot_count:
+            start = max(start - self.hot_count, 0)
+            stop = None if stop is None else stop - self.hot_count
+            posts.extend(load(self.archived[start:stop]))
+        return posts
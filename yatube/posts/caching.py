@@ -0,0 +1,34 @@
+"""Версии для кэшей, которые сбрасываются по событию.
+
+Ключ кэша включает номер версии, а сброс просто меняет версию —
+старые записи больше не читаются и доживают до своего таймаута.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_TIMEOUT = None
+
+
+def _version_key(namespace, key):
+    return f'{namespace}:{key}:version'
+
+
+def _new_version():
+    # Версия от времени, а не с единицы: если ключ версии вытеснят из
+    # кэша, старые записи с прежней версией не оживут.
+    return time.time_ns()
+
+
+def get_version(namespace, key):
+    return cache.get_or_set(
+        _version_key(namespace, key), _new_version, VERSION_TIMEOUT
+    )
+
+
+def bump_version(namespace, key):
+    cache.set(_version_key(namespace, key), _new_version(), VERSION_TIMEOUT)
+
+
+def versioned_key(namespace, key):
+    return f'{namespace}:{key}:{get_version(namespace, key)}'
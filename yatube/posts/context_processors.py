@@ -0,0 +1,13 @@
+from functools import partial
+
+from .notifications import unread_count
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений; считается, только если нужно."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': partial(unread_count, user.id),
+    }
@@ -0,0 +1,216 @@
+"""Удаление постов, комментариев и пользователей.
+
+Пользователь удаляет мягко: строка получает is_deleted и пропадает из
+всех выборок через менеджер по умолчанию, а частичные индексы лент
+удалённые строки вообще не содержат. Настоящее удаление вместе с
+картинками делает фоновая задача purge_deleted небольшими пачками,
+каждая в своей короткой транзакции.
+
+Пользователь с большим числом записей удаляется delete_user: строки,
+которые на него ссылаются, удаляются пачками прямыми DELETE без
+загрузки объектов в память, а файлы картинок — фоновой задачей.
+Его архивные посты снимаются с учёта так же, как горячие, а файлы
+месяцев, где они лежали, перепаковываются без них.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import CASCADE, SET_NULL
+
+from .feeds import invalidate_post_feeds
+from .follow_graph import forget_follows
+from .groups import invalidate_group_feed, post_removed
+from .models import (
+    ArchivedPost, Comment, Follow, Mention, Notification, Post, TaggedPost,
+    TrendingPost, User
+)
+from .notifications import unread_key
+from .signals import release_image
+
+PURGE_BATCH_SIZE = 100
+USER_BATCH_SIZE = 500
+
+
+def _forget_notifications(notifications):
+    recipients = set(notifications.values_list('recipient_id', flat=True))
+    notifications.delete()
+    transaction.on_commit(lambda: cache.delete_many([
+        unread_key(user_id) for user_id in recipients
+    ]))
+
+
+def soft_delete_post(post):
+    with transaction.atomic():
+        if not Post.all_objects.filter(
+            pk=post.pk, is_deleted=False
+        ).update(is_deleted=True):
+            return
+        TaggedPost.objects.filter(post=post).delete()
+        TrendingPost.objects.filter(post=post).delete()
+        Mention.objects.filter(post=post).delete()
+        _forget_notifications(Notification.objects.filter(post=post))
+        if post.group_id is not None:
+            post_removed(post.group_id)
+            invalidate_group_feed(post.group_id)
+    invalidate_post_feeds(post.author_id)
+    post.is_deleted = True
+
+
+def soft_delete_comment(comment):
+    with transaction.atomic():
+        Comment.all_objects.filter(pk=comment.pk).update(is_deleted=True)
+        _forget_notifications(Notification.objects.filter(
+            kind=Notification.COMMENT, source_id=comment.pk
+        ))
+    comment.is_deleted = True
+
+
+def _purge(model, batch_size):
+    purged = 0
+    while True:
+        ids = list(model.all_objects.filter(
+            is_deleted=True
+        ).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        with transaction.atomic():
+            # delete() со сборщиком Django: сигналы освобождают картинки.
+            model.all_objects.filter(pk__in=ids).delete()
+        purged += len(ids)
+
+
+def purge_deleted(batch_size=PURGE_BATCH_SIZE):
+    """Окончательно удаляет помеченные строки, возвращает их число."""
+    return (
+        _purge(Comment, batch_size) + _purge(Post, batch_size)
+    )
+
+
+def reverse_relations(model):
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete
+        and (field.one_to_many or field.one_to_one)
+    ]
+
+
+def raw_delete(model, ids, keep=()):
+    """Удаляет строки и всё, что на них ссылается, без сборщика Django.
+
+    Сигналы при этом не отправляются: их работу вызывающий делает сам.
+    Строки моделей из keep не трогаются: вызывающий удалил их сам, и
+    если ссылки остались, удаление упадёт на внешнем ключе.
+    """
+    using = router.db_for_write(model)
+    for relation in reverse_relations(model):
+        related = relation.related_model
+        if related in keep:
+            continue
+        rows = related._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': ids}
+        )
+        if relation.on_delete is CASCADE:
+            if reverse_relations(related):
+                child_ids = list(rows.values_list('pk', flat=True))
+                if child_ids:
+                    raw_delete(related, child_ids)
+            else:
+                rows._raw_delete(using)
+        elif relation.on_delete is SET_NULL:
+            rows.update(**{relation.field.name: None})
+    model._base_manager.using(using).filter(pk__in=ids)._raw_delete(using)
+
+
+def _delete_posts(ids, groups, images):
+    """Пачка постов автора: счётчики групп и ссылки на картинки.
+
+    Строки читаются под select_for_update: если тот же пост удаляет
+    параллельный запуск, второй дождётся коммита первого и уже не
+    найдёт строку, так что счётчик и ссылку на картинку снимут один раз.
+    """
+    live = Counter()
+    batch_images = []
+    locked = []
+    for pk, group_id, image, is_deleted in Post.all_objects.filter(
+        pk__in=ids
+    ).select_for_update().values_list('pk', 'group_id', 'image', 'is_deleted'):
+        locked.append(pk)
+        if group_id is not None and not is_deleted:
+            live[group_id] += 1
+        if image:
+            batch_images.append(image)
+    if not locked:
+        return
+    raw_delete(Post, locked)
+    for group_id, count in live.items():
+        post_removed(group_id, count)
+        groups.add(group_id)
+    for name in batch_images:
+        release_image(name, purge=False)
+    images.update(batch_images)
+
+
+def _delete_batch(model, ids, groups, images):
+    with transaction.atomic():
+        if model is Post:
+            _delete_posts(ids, groups, images)
+            return
+        if model is ArchivedPost:
+            from .archive import delete_archived
+
+            archived_groups, archived_images = delete_archived(ids)
+            groups.update(archived_groups)
+            images.update(archived_images)
+            return
+        if model is Follow:
+            forget_follows(Follow.objects.filter(
+                pk__in=ids
+            ).values_list('user_id', 'author_id'))
+        raw_delete(model, ids)
+
+
+def delete_user(user, batch_size=USER_BATCH_SIZE, progress=None):
+    """Удаляет пользователя и всё, что на него ссылается, пачками.
+
+    progress(название, удалено) вызывается после каждой пачки.
+    """
+    from .archive import rewrite_month
+    from .tasks import purge_images
+
+    months = set(ArchivedPost.objects.filter(
+        author=user
+    ).values_list('month', flat=True))
+    user.is_active = False
+    user.set_unusable_password()
+    user.save(update_fields=('is_active', 'password'))
+    groups = set()
+    images = set()
+    for relation in reverse_relations(User):
+        model = relation.related_model
+        rows = model._base_manager.filter(**{relation.field.name: user})
+        if relation.on_delete is SET_NULL:
+            rows.update(**{relation.field.name: None})
+            continue
+        done = 0
+        while relation.on_delete is CASCADE:
+            ids = list(rows.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            _delete_batch(model, ids, groups, images)
+            done += len(ids)
+            if progress is not None:
+                progress(model._meta.verbose_name_plural, done)
+    user_id = user.pk
+    user.groups.clear()
+    user.user_permissions.clear()
+    user.delete()
+    for month in sorted(months):
+        rewrite_month(month)
+    invalidate_post_feeds(user_id)
+    for group_id in groups:
+        invalidate_group_feed(group_id)
+    if images:
+        transaction.on_commit(
+            lambda: purge_images.delay(names=sorted(images))
+        )
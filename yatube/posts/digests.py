@@ -0,0 +1,99 @@
+"""Рассылка дайджестов новых постов от авторов из подписок.
+
+Пользователи обрабатываются пачками: на пачку один запрос за постами
+всех её читателей, а все письма уходят через одно SMTP-соединение.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import EmailDigest, Post, User
+
+BATCH_SIZE = 500
+FIRST_DIGEST_PERIOD = timedelta(days=1)
+MAX_POSTS_PER_DIGEST = 20
+SUBJECT = 'Новые посты авторов, на которых вы подписаны'
+
+
+def _user_batches(batch_size):
+    last_id = 0
+    while True:
+        users = list(
+            User.objects.filter(pk__gt=last_id, is_active=True)
+            .exclude(email='').select_related('email_digest')
+            .order_by('pk')[:batch_size]
+        )
+        if not users:
+            return
+        yield users
+        last_id = users[-1].pk
+
+
+def _since(user, now):
+    digest = getattr(user, 'email_digest', None)
+    if digest is None:
+        return now - FIRST_DIGEST_PERIOD
+    return digest.last_sent_at
+
+
+def _new_posts(users, since_by_user, now):
+    """Новые посты для всех читателей пачки одним запросом."""
+    posts = Post.objects.filter(
+        author__following__user__in=users,
+        pub_date__gt=min(since_by_user.values()),
+        pub_date__lte=now
+    ).annotate(
+        reader_id=F('author__following__user')
+    ).select_related('author').order_by('-pub_date')
+    by_reader = defaultdict(list)
+    for post in posts:
+        if post.pub_date > since_by_user[post.reader_id]:
+            by_reader[post.reader_id].append(post)
+    return by_reader
+
+
+def _message(user, posts, connection):
+    body = render_to_string('posts/email/digest.txt', {
+        'user': user,
+        'posts': posts[:MAX_POSTS_PER_DIGEST],
+        'more': max(len(posts) - MAX_POSTS_PER_DIGEST, 0),
+    })
+    return EmailMessage(
+        SUBJECT, body, settings.DEFAULT_FROM_EMAIL, [user.email],
+        connection=connection
+    )
+
+
+def _mark_sent(users, now):
+    existing = [user.email_digest for user in users
+                if getattr(user, 'email_digest', None) is not None]
+    for digest in existing:
+        digest.last_sent_at = now
+    EmailDigest.objects.bulk_update(existing, ['last_sent_at'])
+    EmailDigest.objects.bulk_create(
+        EmailDigest(user=user, last_sent_at=now) for user in users
+        if getattr(user, 'email_digest', None) is None
+    )
+
+
+def send_digests(now=None, batch_size=BATCH_SIZE):
+    """Отправляет дайджесты и возвращает число отправленных писем."""
+    now = now or timezone.now()
+    sent = 0
+    with get_connection() as connection:
+        for users in _user_batches(batch_size):
+            since_by_user = {user.pk: _since(user, now) for user in users}
+            by_reader = _new_posts(users, since_by_user, now)
+            messages = [
+                _message(user, by_reader[user.pk], connection)
+                for user in users if by_reader.get(user.pk)
+            ]
+            if messages:
+                sent += connection.send_messages(messages) or 0
+            _mark_sent(users, now)
+    return sent
@@ -0,0 +1,156 @@
+"""RSS и Atom ленты главной, групп и авторов.
+
+Готовая лента хранится в кэше байтами вместе с ETag; ключ включает
+версию, которую сигналы постов меняют при любом изменении поста.
+"""
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from users.cache import get_user_or_404
+
+from .caching import bump_version, versioned_key
+from .groups import GROUP_FEED
+from .models import Group, Post
+
+FEED_SIZE = 20
+FEED_CACHE_TIME = 60 * 60
+INDEX_FEED = 'index_feed'
+AUTHOR_FEED = 'author_feed'
+TITLE_LETTERS = 50
+
+
+def invalidate_post_feeds(author_id):
+    bump_version(INDEX_FEED, 'all')
+    bump_version(AUTHOR_FEED, author_id)
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние посты'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.select_related('author', 'group')[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.text[:TITLE_LETTERS]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return group.group_posts.select_related('author')[:FEED_SIZE]
+
+
+class ProfilePostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_user_or_404(username)
+
+    def title(self, author):
+        return f'Yatube: посты {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return author.posts.select_related('group')[:FEED_SIZE]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class ProfilePostsAtomFeed(ProfilePostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.title(author)
+
+
+def index_feed_key(kind):
+    return f'{kind}:{versioned_key(INDEX_FEED, "all")}'
+
+
+def group_feed_key(kind, slug):
+    group_id = get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    )
+    return f'{kind}:{versioned_key(GROUP_FEED, group_id)}'
+
+
+def profile_feed_key(kind, username):
+    author_id = get_user_or_404(username).pk
+    return f'{kind}:{versioned_key(AUTHOR_FEED, author_id)}'
+
+
+def cached_feed(feed, cache_key):
+    """Отдаёт ленту из кэша и отвечает 304 на совпавший If-None-Match."""
+    kind = type(feed).__name__
+
+    def view(request, **kwargs):
+        key = 'feed:' + cache_key(kind, **kwargs)
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request, **kwargs)
+            etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+            cached = (response.content, response['Content-Type'], etag)
+            cache.set(key, cached, FEED_CACHE_TIME)
+        content, content_type, etag = cached
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    return view
+
+
+index_rss = cached_feed(LatestPostsFeed(), index_feed_key)
+index_atom = cached_feed(LatestPostsAtomFeed(), index_feed_key)
+group_rss = cached_feed(GroupPostsFeed(), group_feed_key)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_feed_key)
+profile_rss = cached_feed(ProfilePostsFeed(), profile_feed_key)
+profile_atom = cached_feed(ProfilePostsAtomFeed(), profile_feed_key)
@@ -0,0 +1,103 @@
+"""Индекс подписок в кэше.
+
+Для каждого пользователя хранится отсортированный массив id авторов,
+на которых он подписан, и отдельно — массив id его подписчиков.
+Проверка подписки — бинарный поиск, количество — длина массива.
+Подписки через follow()/unfollow() и удаление пользователей стирают
+обе записи пары, и следующее чтение собирает их из базы. Правка массива
+на месте теряла бы изменения при параллельных подписках: между get и
+set нет блокировки. Остальные изменения (админка) подтянутся, когда
+запись в кэше истечёт.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWING_KEY = 'follow_graph:following:{}'
+FOLLOWERS_KEY = 'follow_graph:followers:{}'
+GRAPH_TIMEOUT = 60 * 60
+
+
+def _load(key_template, field, other_field, user_id):
+    key = key_template.format(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = array('q', Follow.objects.filter(
+            **{field: user_id}
+        ).order_by(other_field).values_list(other_field, flat=True))
+        cache.set(key, ids, GRAPH_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id):
+    return _load(FOLLOWING_KEY, 'user_id', 'author_id', user_id)
+
+
+def follower_ids(author_id):
+    return _load(FOLLOWERS_KEY, 'author_id', 'user_id', author_id)
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_id):
+    return _contains(following_ids(user_id), author_id)
+
+
+def follower_count(author_id):
+    return len(follower_ids(author_id))
+
+
+def following_count(user_id):
+    return len(following_ids(user_id))
+
+
+def mutual_follow_ids(user_id):
+    """id пользователей, подписанных друг на друга с user_id."""
+    following, followers = following_ids(user_id), follower_ids(user_id)
+    result, i, j = [], 0, 0
+    while i < len(following) and j < len(followers):
+        if following[i] == followers[j]:
+            result.append(following[i])
+            i += 1
+            j += 1
+        elif following[i] < followers[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _invalidate(user_id, author_id):
+    keys = [FOLLOWING_KEY.format(user_id), FOLLOWERS_KEY.format(author_id)]
+    # Второй сброс после коммита убирает запись, которую успел собрать
+    # параллельный запрос, прочитавший базу до коммита.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def follow(user_id, author_id):
+    """Подписка одним INSERT: повторная подписка игнорируется базой."""
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)],
+        ignore_conflicts=True
+    )
+    _invalidate(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    Follow.objects.filter(user_id=user_id, author_id=author_id).delete()
+    _invalidate(user_id, author_id)
+
+
+def forget_follows(pairs):
+    """Убирает из индекса пары (подписчик, автор), удалённые в обход
+    unfollow()."""
+    for user_id, author_id in pairs:
+        _invalidate(user_id, author_id)
@@ -18,6 +18,15 @@ class PostForm(forms.ModelForm):
             'image': 'Загрузите вашу картинку',
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # Ошибку загрузки нашёл ImageUploadHandler, она точнее ошибки поля.
+        error = getattr(self.files.get('image'), 'upload_error', None)
+        if error:
+            self.errors.pop('image', None)
+            self.add_error('image', error)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
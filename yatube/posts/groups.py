@@ -0,0 +1,59 @@
+"""Каталог групп со счётчиками постов.
+
+posts_count и last_post_at у Group обновляются по одному посту при его
+создании, переносе в другую группу и удалении, а готовый список групп
+лежит в кэше до первого такого изменения.
+"""
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .caching import bump_version
+from .models import Group, Post
+
+DIRECTORY_KEY = 'group_directory'
+GROUP_FEED = 'group_feed'
+DIRECTORY_TIMEOUT = 60 * 60
+
+
+def group_directory():
+    groups = cache.get(DIRECTORY_KEY)
+    if groups is None:
+        groups = list(Group.objects.order_by(
+            F('last_post_at').desc(nulls_last=True), 'title'
+        ).values(
+            'title', 'slug', 'description', 'posts_count', 'last_post_at'
+        ))
+        cache.set(DIRECTORY_KEY, groups, DIRECTORY_TIMEOUT)
+    return groups
+
+
+def invalidate_directory():
+    cache.delete(DIRECTORY_KEY)
+
+
+def post_added(group_id, pub_date):
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_at=Greatest(
+            Coalesce('last_post_at', Value(pub_date)), Value(pub_date)
+        )
+    )
+    invalidate_directory()
+
+
+def post_removed(group_id, count=1):
+    latest = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by('-pub_date').values('pub_date')[:1]
+    # Счётчик мог разойтись с базой; уход ниже нуля нарушил бы
+    # PositiveIntegerField и сорвал всю пачку удаления.
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') - count, Value(0)),
+        last_post_at=Subquery(latest)
+    )
+    invalidate_directory()
+
+
+def invalidate_group_feed(group_id):
+    bump_version(GROUP_FEED, group_id)
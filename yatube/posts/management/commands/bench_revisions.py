@@ -0,0 +1,94 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post, PostRevision
+from posts.revisions import (
+    SNAPSHOT_EVERY, apply_diff, is_snapshot_number, make_diff, storage_stats
+)
+
+
+def synthetic_history(words, revisions, seed=0):
+    """Длинный текст и серия мелких правок: замены, вставки, удаления."""
+    rng = random.Random(seed)
+    vocabulary = [f'слово{i}' for i in range(500)]
+    tokens = [rng.choice(vocabulary) for _ in range(words)]
+    texts = [' '.join(tokens)]
+    for _ in range(revisions - 1):
+        for _ in range(rng.randint(1, 5)):
+            position = rng.randrange(len(tokens))
+            action = rng.random()
+            if action < 0.5:
+                tokens[position] = rng.choice(vocabulary)
+            elif action < 0.8:
+                tokens.insert(position, rng.choice(vocabulary))
+            elif len(tokens) > 1:
+                del tokens[position]
+        texts.append(' '.join(tokens))
+    return texts
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер истории правок в виде разниц с хранением '
+        'полных копий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--synthetic', action='store_true',
+            help='Прогнать на сгенерированной истории вместо базы.'
+        )
+        parser.add_argument('--words', type=int, default=2000)
+        parser.add_argument('--revisions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            self.synthetic(options['words'], options['revisions'])
+        else:
+            self.database()
+
+    def report(self, stored, full):
+        ratio = stored / full if full else 0
+        self.stdout.write(
+            f'Разницы: {stored} байт, полные копии: {full} байт, '
+            f'доля: {ratio:.1%} (снимок каждые {SNAPSHOT_EVERY} версий)'
+        )
+
+    def database(self):
+        stored = full = 0
+        posts = Post.objects.filter(revisions__isnull=False).distinct()
+        for post in posts.iterator():
+            post_stored, post_full = storage_stats(
+                PostRevision.objects.filter(post=post)
+            )
+            stored += post_stored
+            full += post_full
+        self.report(stored, full)
+
+    def synthetic(self, words, revisions):
+        texts = synthetic_history(words, revisions)
+        started = time.perf_counter()
+        diffs = []
+        for number, (old, new) in enumerate(zip(texts, texts[1:]), 2):
+            data = new if is_snapshot_number(number) else make_diff(old, new)
+            diffs.append((number, data))
+        diff_time = time.perf_counter() - started
+        stored = len(texts[0].encode())
+        text = texts[0]
+        started = time.perf_counter()
+        for number, data in diffs:
+            stored += len(data.encode())
+            text = data if is_snapshot_number(number) else apply_diff(
+                text, data
+            )
+        apply_time = time.perf_counter() - started
+        assert text == texts[-1]
+        full = sum(len(text.encode()) for text in texts)
+        self.report(stored, full)
+        self.stdout.write(
+            f'Слов: {len(texts[-1].split())}, версий: {revisions}, '
+            f'построение разниц: {diff_time * 1000:.1f} мс, '
+            f'восстановление: {apply_time * 1000:.1f} мс'
+        )
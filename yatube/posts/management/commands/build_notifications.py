@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import build_notifications
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уведомления о новых комментариях, подписках и упоминаниях.'
+
+    def handle(self, *args, **options):
+        created = build_notifications()
+        self.stdout.write(f'Обработано событий: {created}')
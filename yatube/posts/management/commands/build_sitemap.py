@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import URLS_PER_FILE, build_sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Собирает sitemap.xml и его части в SITEMAP_ROOT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default=settings.SITE_URL)
+        parser.add_argument(
+            '--urls-per-file', type=int, default=URLS_PER_FILE
+        )
+
+    def handle(self, *args, **options):
+        names = build_sitemaps(
+            settings.SITEMAP_ROOT,
+            options['base_url'],
+            options['urls_per_file']
+        )
+        self.stdout.write(f'Записано файлов: {len(names)}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import TOP_K, rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «Кого почитать» для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        count = rebuild_suggestions(options['top'])
+        self.stdout.write(f'Сохранено рекомендаций: {count}')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import USER_BATCH_SIZE, delete_user
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Удаляет пользователя и его данные пачками, показывая прогресс.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--batch-size', type=int, default=USER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError('Пользователь не найден.')
+
+        def progress(name, done):
+            self.stdout.write(f'{name}: удалено {done}')
+
+        delete_user(user, options['batch_size'], progress)
+        self.stdout.write(f'Пользователь {options["username"]} удалён.')
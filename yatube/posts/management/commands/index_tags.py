@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tags import index_post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет индекс хэштегов и упоминаний по уже созданным постам.'
+
+    def handle(self, *args, **options):
+        indexed = 0
+        for post in Post.objects.only(
+            'pk', 'text', 'author_id', 'pub_date'
+        ).iterator():
+            index_post(post)
+            indexed += 1
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
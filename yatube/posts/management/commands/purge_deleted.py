@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import PURGE_BATCH_SIZE, purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Окончательно удаляет посты и комментарии, помеченные удалёнными.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        purged = purge_deleted(options['batch_size'])
+        self.stdout.write(f'Удалено строк: {purged}')
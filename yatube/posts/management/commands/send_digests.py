@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import BATCH_SIZE, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Рассылает дайджесты новых постов от авторов из подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = send_digests(batch_size=options['batch_size'])
+        self.stdout.write(f'Отправлено писем: {sent}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = 'Обновляет рейтинг популярных постов и групп.'
+
+    def handle(self, *args, **options):
+        posts, groups = update_trending()
+        self.stdout.write(
+            f'Обновлено постов: {posts}, групп: {groups}'
+        )
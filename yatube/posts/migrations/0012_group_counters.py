@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+def fill_group_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    stats = Post.objects.filter(group__isnull=False).values(
+        'group_id'
+    ).annotate(
+        count=models.Count('id'), latest=models.Max('pub_date')
+    )
+    for row in stats:
+        Group.objects.filter(pk=row['group_id']).update(
+            posts_count=row['count'], last_post_at=row['latest']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_group_counters, migrations.RunPython.noop),
+    ]
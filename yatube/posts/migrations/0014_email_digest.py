@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0013_post_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDigest',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='email_digest', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_sent_at', models.DateTimeField()),
+            ],
+        ),
+    ]
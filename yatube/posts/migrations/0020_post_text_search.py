@@ -0,0 +1,30 @@
+from django.db import migrations
+
+INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS post_text_search ON posts_post "
+    "USING gin (to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+)
+DROP_SQL = 'DROP INDEX IF EXISTS post_text_search'
+
+
+def create_index(apps, schema_editor):
+    # Полнотекстовый индекс нужен только PostgreSQL: на других базах
+    # админка ищет обычным LIKE.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(INDEX_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
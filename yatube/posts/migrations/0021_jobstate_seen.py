@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobstate',
+            name='seen',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -1,15 +1,28 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .storage import ContentAddressedStorage
+
 LETTERS = 15
 
 User = get_user_model()
 
 
+class LiveManager(models.Manager):
+    """Менеджер по умолчанию: строки, помеченные удалёнными, не видны."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    last_post_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
 
     def __str__(self):
         return self.title
@@ -37,16 +50,74 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    is_deleted = models.BooleanField(default=False, editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        base_manager_name = 'all_objects'
+        indexes = [
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_group_feed',
+                condition=models.Q(is_deleted=False)
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_feed',
+                condition=models.Q(is_deleted=False)
+            ),
+            models.Index(
+                fields=('-pub_date',),
+                name='post_feed',
+                condition=models.Q(is_deleted=False)
+            ),
+        ]
 
     def __str__(self):
         return self.text[:LETTERS]
 
 
-class Meta:
-    ordering = ("-pub_date")
-    verbose_name = 'Группы'
+class PostRevision(models.Model):
+    """Версия текста поста: полный снимок или разница с предыдущей."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    number = models.PositiveIntegerField()
+    editor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    is_snapshot = models.BooleanField(default=False)
+    data = models.TextField()
+
+    class Meta:
+        ordering = ('number',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('post', 'number'),
+                name='unique_post_revision'
+            ),
+        ]
+
+
+class ImageBlob(models.Model):
+    """Счётчик ссылок постов на файл картинки в хранилище по хэшу."""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.name
 
 
 class Comment(models.Model):
@@ -66,6 +137,20 @@ class Comment(models.Model):
         help_text='Добавте сюда ваш комментарий'
     )
     created = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField(default=False, editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        base_manager_name = 'all_objects'
+        indexes = [
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_thread',
+                condition=models.Q(is_deleted=False)
+            ),
+        ]
 
     def __str__(self):
         return self.text[:LETTERS]
@@ -88,3 +173,235 @@ class Follow(models.Model):
         verbose_name='Дата и время подписки',
         auto_now_add=True
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'
+            ),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """Готовая рекомендация «Кого почитать», считается пакетно."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [
+            models.Index(fields=('user', '-score'), name='suggestion_top'),
+        ]
+
+
+class EmailDigest(models.Model):
+    """Когда пользователю в последний раз ушёл дайджест новых постов."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='email_digest'
+    )
+    last_sent_at = models.DateTimeField()
+
+
+class JobState(models.Model):
+    """Отметка, до которой фоновая задача уже обработала данные."""
+    name = models.CharField(max_length=100, unique=True)
+    last_run = models.DateTimeField(null=True, blank=True)
+    # id строк, уже учтённых в перекрытии окна чтения, в JSON.
+    seen = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return self.name
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    score = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        ordering = ('-score',)
+
+
+class TrendingGroup(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    score = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        ordering = ('-score',)
+
+
+class ArchivedPost(models.Model):
+    """Где в архиве лежит перенесённый из горячей таблицы пост."""
+    post_id = models.PositiveIntegerField(primary_key=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+    month = models.CharField(max_length=7)
+    # Номер файла месяца: rewrite_month пишет новый файл, а не подменяет.
+    generation = models.PositiveIntegerField(default=0)
+    offset = models.BigIntegerField()
+    length = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='archived_author_feed'
+            ),
+        ]
+
+
+class ArchiveMonth(models.Model):
+    """Текущий файл месяца архива; строка служит блокировкой месяца."""
+    month = models.CharField(max_length=7, primary_key=True)
+    generation = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.month
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TaggedPost(models.Model):
+    """Обратный индекс хэштегов: тег → посты по дате публикации."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='tagged_posts'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tagged'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('tag', 'post'),
+                name='unique_tagged_post'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('tag', '-pub_date', '-post'),
+                name='tag_feed'
+            ),
+        ]
+
+
+class Mention(models.Model):
+    """Упоминание пользователя через @имя в тексте поста."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('post', 'user'),
+                name='unique_mention'
+            ),
+        ]
+
+
+class Notification(models.Model):
+    """Событие во входящих пользователя; пишется пакетной задачей."""
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    MENTION = 'mention'
+    KINDS = (
+        (COMMENT, 'Комментарий'),
+        (FOLLOW, 'Подписка'),
+        (MENTION, 'Упоминание'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    kind = models.CharField(max_length=10, choices=KINDS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    source_id = models.PositiveIntegerField()
+    created = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ('-created',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'source_id'),
+                name='unique_notification_source'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('recipient', '-created'),
+                name='notification_inbox'
+            ),
+            models.Index(
+                fields=('recipient', 'is_read'),
+                name='notification_unread'
+            ),
+        ]
@@ -0,0 +1,156 @@
+"""Входящие уведомления о комментариях, подписках и упоминаниях.
+
+Запросы add_comment и profile_follow ничего не знают об уведомлениях:
+пакетная задача забирает новые Comment, Follow и Mention после
+отметки в JobState и вставляет Notification пачками. Окно чтения
+немного перекрывает прошлое, чтобы не потерять строки из долгих
+транзакций, а повторы отсекает уникальность (kind, source_id).
+Число непрочитанных хранится в общем кэше (core.E001) и сбрасывается
+при вставке, так что пакетная задача обновляет его и для веб-воркеров.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Comment, Follow, JobState, Mention, Notification, Post
+
+JOB_NAME = 'notifications'
+OVERLAP = timedelta(minutes=5)
+FIRST_RUN_PERIOD = timedelta(days=1)
+BATCH_SIZE = 1000
+UNREAD_TIMEOUT = 60 * 60
+ACTORS_SHOWN = 3
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _events(since, until):
+    for pk, recipient, actor, post, created in Comment.objects.filter(
+        created__gt=since, created__lte=until, post__isnull=False,
+        post__is_deleted=False
+    ).exclude(author=F('post__author')).values_list(
+        'pk', 'post__author_id', 'author_id', 'post_id', 'created'
+    ).iterator():
+        yield Notification(
+            kind=Notification.COMMENT, source_id=pk, recipient_id=recipient,
+            actor_id=actor, post_id=post, created=created
+        )
+    for pk, recipient, actor, created in Follow.objects.filter(
+        following_date__gt=since, following_date__lte=until
+    ).values_list('pk', 'author_id', 'user_id', 'following_date').iterator():
+        yield Notification(
+            kind=Notification.FOLLOW, source_id=pk, recipient_id=recipient,
+            actor_id=actor, created=created
+        )
+    for pk, recipient, actor, post, created in Mention.objects.filter(
+        created__gt=since, created__lte=until, post__is_deleted=False
+    ).values_list(
+        'pk', 'user_id', 'post__author_id', 'post_id', 'created'
+    ).iterator():
+        yield Notification(
+            kind=Notification.MENTION, source_id=pk, recipient_id=recipient,
+            actor_id=actor, post_id=post, created=created
+        )
+
+
+def build_notifications(now=None, batch_size=BATCH_SIZE):
+    """Превращает новые события в уведомления, возвращает их число."""
+    now = now or timezone.now()
+    state, _ = JobState.objects.get_or_create(name=JOB_NAME)
+    if state.last_run:
+        since = state.last_run - OVERLAP
+    else:
+        since = now - FIRST_RUN_PERIOD
+    total = 0
+    batch = []
+    recipients = set()
+    for notification in _events(since, now):
+        batch.append(notification)
+        recipients.add(notification.recipient_id)
+        if len(batch) >= batch_size:
+            Notification.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+    Notification.objects.bulk_create(batch, ignore_conflicts=True)
+    total += len(batch)
+    cache.delete_many([unread_key(user_id) for user_id in recipients])
+    state.last_run = now
+    state.save(update_fields=('last_run',))
+    return total
+
+
+def unread_count(user_id):
+    key = unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient_id=user_id, is_read=False
+        ).count()
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def _groups_filter(groups):
+    condition = Q(pk__in=[])
+    for group in groups:
+        condition |= Q(kind=group['kind'], post=group['post'])
+    return condition
+
+
+def mark_read(user_id, groups):
+    """Отмечает прочитанными уведомления показанных групп.
+
+    Уведомления, пришедшие после показа страницы, остаются новыми.
+    """
+    groups = list(groups)
+    if not groups:
+        return
+    Notification.objects.filter(
+        _groups_filter(groups),
+        recipient_id=user_id,
+        is_read=False,
+        created__lte=max(group['last'] for group in groups)
+    ).update(is_read=True)
+    cache.delete(unread_key(user_id))
+
+
+def inbox(user_id):
+    """Уведомления, свёрнутые по виду и посту: «5 человек ответили»."""
+    return Notification.objects.filter(recipient_id=user_id).values(
+        'kind', 'post'
+    ).annotate(
+        people=Count('actor', distinct=True),
+        last=Max('created'),
+        unread=Count('pk', filter=Q(is_read=False))
+    ).order_by('-last', 'kind', 'post')
+
+
+def describe(user_id, groups):
+    """Добавляет к группам страницы пост и последних участников.
+
+    Участники всех групп страницы читаются одним запросом: по строке на
+    участника группы, от последнего события к первому.
+    """
+    groups = list(groups)
+    posts = Post.objects.in_bulk(
+        {group['post'] for group in groups} - {None}
+    )
+    actors = defaultdict(list)
+    for kind, post_id, username in Notification.objects.filter(
+        _groups_filter(groups), recipient_id=user_id
+    ).values('kind', 'post', 'actor__username').annotate(
+        latest=Max('created')
+    ).order_by('-latest').values_list('kind', 'post', 'actor__username'):
+        actors[kind, post_id].append(username)
+    for group in groups:
+        group['actors'] = actors[group['kind'], group['post']][
+            :ACTORS_SHOWN
+        ]
+        group['post'] = posts.get(group['post'])
+        group['others'] = group['people'] - len(group['actors'])
+    return groups
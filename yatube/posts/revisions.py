@@ -0,0 +1,134 @@
+"""История правок постов.
+
+Каждая версия хранится как разница с предыдущей, а каждая
+SNAPSHOT_EVERY-я — целиком. Чтобы восстановить версию, достаточно
+одного запроса: ближайший снимок плюс не больше SNAPSHOT_EVERY - 1
+разниц после него.
+
+Разница — JSON-список по словам (слово вместе с пробелами после него):
+положительное число — взять столько слов из прошлой версии,
+отрицательное — пропустить, строка — вставить.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Post, PostRevision
+
+SNAPSHOT_EVERY = 10
+TOKEN_RE = re.compile(r'^\s+|\S+\s*')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def make_diff(old, new):
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    ops = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(''.join(new_tokens[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_diff(old, diff):
+    tokens = tokenize(old)
+    position = 0
+    parts = []
+    for op in json.loads(diff):
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.extend(tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(parts)
+
+
+def is_snapshot_number(number):
+    return (number - 1) % SNAPSHOT_EVERY == 0
+
+
+def record_revision(post, old_text, editor):
+    """Сохраняет новую версию post.text после правки.
+
+    Разница строится от old_text, поэтому сначала проверяется, что
+    последняя сохранённая версия совпадает с ним. Если текст меняли в
+    обход истории или параллельной правкой, old_text сохраняется
+    снимком, и цепочка разниц не рвётся. Если post.text уже последняя
+    версия, ничего не пишется.
+    """
+    with transaction.atomic():
+        # Блокировка строки поста упорядочивает параллельные правки:
+        # иначе обе получили бы один номер версии.
+        Post.all_objects.select_for_update().filter(pk=post.pk).exists()
+        last = post.revisions.aggregate(last=Max('number'))['last']
+        revisions = []
+        if last is None:
+            last = 0
+            latest = None
+        else:
+            latest = revision_text(post, last)
+            if latest == post.text:
+                return
+        if latest != old_text:
+            last += 1
+            revisions.append(PostRevision(
+                post=post, number=last,
+                editor=post.author if last == 1 else None,
+                is_snapshot=True, data=old_text
+            ))
+        number = last + 1
+        snapshot = is_snapshot_number(number)
+        revisions.append(PostRevision(
+            post=post, number=number, editor=editor, is_snapshot=snapshot,
+            data=post.text if snapshot else make_diff(old_text, post.text)
+        ))
+        PostRevision.objects.bulk_create(revisions)
+
+
+def _replay(revisions):
+    text = ''
+    for revision in revisions:
+        if revision.is_snapshot:
+            text = revision.data
+        else:
+            text = apply_diff(text, revision.data)
+        yield revision, text
+
+
+def revision_text(post, number):
+    """Текст версии number одним запросом от ближайшего снимка."""
+    first = number - (number - 1) % SNAPSHOT_EVERY
+    revisions = post.revisions.filter(number__gte=first, number__lte=number)
+    text = None
+    for _, text in _replay(revisions):
+        pass
+    return text
+
+
+def history(post):
+    """Все версии поста от новой к старой вместе с текстом."""
+    if getattr(post, 'archived', False):
+        return list(_replay(post.archived_revisions))[::-1]
+    return list(_replay(post.revisions.select_related('editor')))[::-1]
+
+
+def storage_stats(revisions):
+    """Размер хранимых данных против полных копий каждой версии."""
+    stored = full = 0
+    for revision, text in _replay(revisions):
+        stored += len(revision.data.encode())
+        full += len(text.encode())
+    return stored, full
@@ -0,0 +1,160 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save
+)
+from django.dispatch import receiver
+from sorl.thumbnail import delete as delete_image_and_thumbnails
+
+from .feeds import invalidate_post_feeds
+from .groups import (
+    invalidate_directory, invalidate_group_feed, post_added, post_removed
+)
+from .models import Group, ImageBlob, Post
+from .revisions import record_revision
+from .storage import is_content_addressed
+from .tags import index_post
+
+
+def acquire_image(name):
+    if not is_content_addressed(name):
+        return
+    blobs = ImageBlob.objects.filter(name=name)
+    if blobs.update(refs=F('refs') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ImageBlob.objects.create(name=name, refs=1)
+    except IntegrityError:
+        blobs.update(refs=F('refs') + 1)
+
+
+def purge_image(name):
+    """Удаляет файл без ссылок, пока строка ImageBlob заблокирована.
+
+    Новая загрузка того же файла берёт ссылку до записи на диск
+    (reserve_new_image) и ждёт эту блокировку: после неё она либо
+    увидит, что счётчик уже не нулевой, либо запишет файл заново.
+    """
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(
+            name=name, refs__lte=0
+        ).first()
+        if blob is None:
+            return
+        delete_image_and_thumbnails(name)
+        blob.delete()
+
+
+def release_image(name, purge=True):
+    """Снимает ссылку на картинку; файл удаляется после коммита.
+
+    С purge=False удаление файла остаётся вызывающему, например
+    фоновой задаче.
+    """
+    if not is_content_addressed(name):
+        return
+    ImageBlob.objects.filter(name=name).update(refs=F('refs') - 1)
+    if purge:
+        transaction.on_commit(lambda: purge_image(name))
+
+
+def image_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_original(sender, instance, **kwargs):
+    instance._original_image = image_name(instance.__dict__.get('image'))
+    instance._original_group_id = instance.__dict__.get('group_id')
+    instance._original_text = instance.__dict__.get('text')
+
+
+@receiver(pre_save, sender=Post)
+def reserve_new_image(sender, instance, **kwargs):
+    """Берёт ссылку на загружаемую картинку до записи файла."""
+    image = instance.__dict__.get('image')
+    if not image or getattr(image, '_committed', True):
+        return
+    storage = image.storage
+    if not hasattr(storage, 'content_name'):
+        return
+    name = storage.content_name(
+        image.field.generate_filename(instance, image.name), image.file
+    )
+    acquire_image(name)
+    instance._reserved_image = name
+
+
+@receiver(post_save, sender=Post)
+def track_image_refs(sender, instance, created, **kwargs):
+    if 'image' not in instance.__dict__:
+        return
+    name = image_name(instance.image)
+    original = '' if created else instance._original_image
+    reserved = instance.__dict__.pop('_reserved_image', None)
+    if name != original:
+        if name != reserved:
+            acquire_image(name)
+        release_image(original)
+    if reserved and (name == original or name != reserved):
+        # Ссылка взята, но картинка у поста не сменилась на эту.
+        release_image(reserved)
+    instance._original_image = name
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    release_image(image_name(instance.__dict__.get('image')))
+
+
+@receiver(post_save, sender=Post)
+def track_group_changes(sender, instance, created, **kwargs):
+    original = None if created else instance._original_group_id
+    if instance.group_id != original:
+        if instance.group_id is not None:
+            post_added(instance.group_id, instance.pub_date)
+        if original is not None:
+            post_removed(original)
+            invalidate_group_feed(original)
+    if instance.group_id is not None:
+        invalidate_group_feed(instance.group_id)
+    instance._original_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def track_group_removal(sender, instance, **kwargs):
+    # Счётчик группы уже уменьшили при мягком удалении.
+    if instance.group_id is not None and not instance.is_deleted:
+        post_removed(instance.group_id)
+        invalidate_group_feed(instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_post_feeds(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def track_text(sender, instance, created, **kwargs):
+    """Индекс тегов и история правок при любом сохранении текста.
+
+    Кто правил, view и админка сообщают через instance._editor.
+    """
+    if 'text' not in instance.__dict__:
+        return
+    if created or instance.text != instance._original_text:
+        index_post(instance)
+    original = instance._original_text
+    if not created and original is not None and instance.text != original:
+        record_revision(
+            instance, original, getattr(instance, '_editor', None)
+        )
+    instance._original_text = instance.text
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    invalidate_directory()
@@ -0,0 +1,117 @@
+"""Сборка sitemap.xml на диск потоковой записью.
+
+Адреса читаются через iterator() и сразу пишутся в файлы по 50 000
+адресов, так что память не растёт с числом постов. Файлы сначала
+пишутся во временные и подменяются атомарно.
+"""
+import os
+from xml.sax.saxutils import escape
+
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+URLS_PER_FILE = 50000
+INDEX_NAME = 'sitemap.xml'
+FILE_NAME = 'sitemap-{}.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _lastmod(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def site_urls():
+    """Пары (путь, дата изменения) для всех страниц сайта."""
+    yield reverse('posts:index'), None
+    yield reverse('posts:group_index'), None
+    for slug, last_post_at in Group.objects.order_by('pk').values_list(
+        'slug', 'last_post_at'
+    ).iterator():
+        yield reverse('posts:group_list', args=(slug,)), last_post_at
+    authors = User.objects.annotate(
+        lastmod=Max('posts__pub_date')
+    ).filter(lastmod__isnull=False).order_by('pk')
+    for username, lastmod in authors.values_list(
+        'username', 'lastmod'
+    ).iterator():
+        yield reverse('posts:profile', args=(username,)), lastmod
+    for pk, pub_date in Post.objects.order_by('pk').values_list(
+        'pk', 'pub_date'
+    ).iterator():
+        yield reverse('posts:post_detail', args=(pk,)), pub_date
+
+
+class SitemapWriter:
+    def __init__(self, root, base_url, urls_per_file=URLS_PER_FILE):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.urls_per_file = urls_per_file
+        self.files = []
+        self.file = None
+
+    def _tmp(self, name):
+        return os.path.join(self.root, name + '.tmp')
+
+    def _open(self):
+        name = FILE_NAME.format(len(self.files) + 1)
+        self.file = open(self._tmp(name), 'w', encoding='utf-8')
+        self.file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="{XMLNS}">\n'
+        )
+        self.files.append([name, None])
+        self.count = 0
+
+    def _close(self):
+        self.file.write('</urlset>\n')
+        self.file.close()
+        self.file = None
+
+    def add(self, path, lastmod=None):
+        if self.file is None or self.count >= self.urls_per_file:
+            if self.file is not None:
+                self._close()
+            self._open()
+        entry = f'<url><loc>{escape(self.base_url + path)}</loc>'
+        if lastmod:
+            entry += f'<lastmod>{_lastmod(lastmod)}</lastmod>'
+            current = self.files[-1]
+            if current[1] is None or lastmod > current[1]:
+                current[1] = lastmod
+        self.file.write(entry + '</url>\n')
+        self.count += 1
+
+    def finish(self):
+        if self.file is not None:
+            self._close()
+        with open(self._tmp(INDEX_NAME), 'w', encoding='utf-8') as index:
+            index.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<sitemapindex xmlns="{XMLNS}">\n'
+            )
+            for name, lastmod in self.files:
+                entry = f'<sitemap><loc>{escape(self.base_url)}/{name}</loc>'
+                if lastmod:
+                    entry += f'<lastmod>{_lastmod(lastmod)}</lastmod>'
+                index.write(entry + '</sitemap>\n')
+            index.write('</sitemapindex>\n')
+        names = [name for name, _ in self.files] + [INDEX_NAME]
+        for name in names:
+            os.replace(self._tmp(name), os.path.join(self.root, name))
+        self._remove_stale(names)
+        return names
+
+    def _remove_stale(self, names):
+        for name in os.listdir(self.root):
+            if name.startswith('sitemap-') and name not in names:
+                os.remove(os.path.join(self.root, name))
+
+
+def build_sitemaps(root, base_url, urls_per_file=URLS_PER_FILE):
+    os.makedirs(root, exist_ok=True)
+    writer = SitemapWriter(root, base_url, urls_per_file)
+    for path, lastmod in site_urls():
+        writer.add(path, lastmod)
+    return writer.finish()
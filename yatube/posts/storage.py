@@ -0,0 +1,68 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_NAME_RE = re.compile(r'^[\w/-]+/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def content_hash(content):
+    """sha256 содержимого файла, читает его по частям."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_addressed_name(name, digest):
+    directory, filename = os.path.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, digest[:2], digest + extension)
+
+
+def is_content_addressed(name):
+    return bool(name) and bool(CONTENT_NAME_RE.match(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Сохраняет файл под хэшем его содержимого.
+
+    Повторная загрузка того же файла не создаёт копию: возвращается
+    имя уже лежащего на диске файла, а значит, и миниатюры sorl для
+    него переиспользуются. Новый файл пишется во временный и
+    переименовывается на место атомарно: две одновременные загрузки
+    одного файла получают одно и то же имя, а не копию с суффиксом.
+    """
+
+    def content_name(self, name, content):
+        digest = getattr(content, 'content_hash', None)
+        if digest is None:
+            digest = content_hash(content)
+        return content_addressed_name(name, digest)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    temp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Если файл успела записать параллельная загрузка, замена
+            # на то же содержимое ничего не портит.
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
@@ -0,0 +1,95 @@
+"""Подбор рекомендаций «Кого почитать» по графу подписок.
+
+Считается пакетно (команда compute_follow_suggestions), на странице
+только читается готовый топ из FollowSuggestion.
+"""
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Comment, Follow, FollowSuggestion, Post
+
+FRIEND_OF_FRIEND_WEIGHT = 1.0
+CO_COMMENTER_WEIGHT = 0.5
+SHARED_GROUP_WEIGHT = 0.2
+# Под очень популярными постами и в больших группах пары не
+# перебираются: связь «все со всеми» ничего не говорит о вкусах.
+MAX_CLIQUE_SIZE = 200
+TOP_K = 10
+BATCH_SIZE = 1000
+
+
+def _memberships(pairs):
+    """Пары (пользователь, сообщество) в {сообщество: пользователи}."""
+    members = defaultdict(set)
+    for user_id, key in pairs:
+        members[key].add(user_id)
+    return members
+
+
+def _add_clique_scores(scores, members, weight):
+    for users in members.values():
+        if len(users) < 2 or len(users) > MAX_CLIQUE_SIZE:
+            continue
+        for user_id in users:
+            user_scores = scores[user_id]
+            for other_id in users:
+                if other_id != user_id:
+                    user_scores[other_id] += weight
+
+
+def compute_scores():
+    """Оценки кандидатов для каждого пользователя.
+
+    Граф хранится разреженно — словарями множеств, поэтому работа
+    пропорциональна числу рёбер, а не квадрату числа пользователей.
+    """
+    following = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        following[user_id].add(author_id)
+
+    scores = defaultdict(lambda: defaultdict(float))
+    for user_id, authors in following.items():
+        user_scores = scores[user_id]
+        for author_id in authors:
+            for candidate_id in following.get(author_id, ()):
+                user_scores[candidate_id] += FRIEND_OF_FRIEND_WEIGHT
+
+    _add_clique_scores(scores, _memberships(
+        Comment.objects.values_list('author_id', 'post_id').distinct()
+        .iterator()
+    ), CO_COMMENTER_WEIGHT)
+    _add_clique_scores(scores, _memberships(
+        Post.objects.filter(group__isnull=False)
+        .values_list('author_id', 'group_id').distinct().iterator()
+    ), SHARED_GROUP_WEIGHT)
+
+    for user_id, user_scores in scores.items():
+        user_scores.pop(user_id, None)
+        for author_id in following.get(user_id, ()):
+            user_scores.pop(author_id, None)
+    return scores
+
+
+def top_suggestions(scores, k=TOP_K):
+    for user_id, user_scores in scores.items():
+        best = heapq.nlargest(
+            k, user_scores.items(), key=lambda item: (item[1], -item[0])
+        )
+        for suggested_id, score in best:
+            yield FollowSuggestion(
+                user_id=user_id, suggested_id=suggested_id, score=score
+            )
+
+
+def rebuild_suggestions(k=TOP_K):
+    suggestions = list(top_suggestions(compute_scores(), k))
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(
+            suggestions, batch_size=BATCH_SIZE
+        )
+    return len(suggestions)
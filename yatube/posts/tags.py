@@ -0,0 +1,98 @@
+"""Хэштеги и упоминания в тексте постов.
+
+При сохранении пост разбирается на #теги и @имена. Теги попадают в
+обратный индекс TaggedPost с датой публикации, так что лента тега —
+это диапазон по индексу (tag, -pub_date, -post), а не LIKE по текстам.
+Ленты листаются по ключу (дата, id) последнего показанного поста:
+глубина страницы не влияет на стоимость запроса.
+"""
+import re
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Mention, Post, Tag, TaggedPost, User
+
+TAG_RE = re.compile(r'(?<![\w&#])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+TAG_PAGE_SIZE = 10
+
+
+def parse_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def parse_mentions(text):
+    # Точка в конце — обычно конец предложения, а не часть имени.
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)} - {''}
+
+
+def index_tags(post):
+    names = parse_tags(post.text)
+    current = dict(TaggedPost.objects.filter(post=post).values_list(
+        'tag__name', 'pk'
+    ))
+    stale = [pk for name, pk in current.items() if name not in names]
+    if stale:
+        TaggedPost.objects.filter(pk__in=stale).delete()
+    new = names - set(current)
+    if not new:
+        return
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in new], ignore_conflicts=True
+    )
+    TaggedPost.objects.bulk_create([
+        TaggedPost(tag=tag, post=post, pub_date=post.pub_date)
+        for tag in Tag.objects.filter(name__in=new)
+    ], ignore_conflicts=True)
+
+
+def index_mentions(post):
+    user_ids = set(User.objects.filter(
+        username__in=parse_mentions(post.text)
+    ).exclude(pk=post.author_id).values_list('pk', flat=True))
+    Mention.objects.filter(post=post).exclude(user__in=user_ids).delete()
+    Mention.objects.bulk_create([
+        Mention(post=post, user_id=user_id) for user_id in user_ids
+    ], ignore_conflicts=True)
+
+
+def index_post(post):
+    index_tags(post)
+    index_mentions(post)
+
+
+def encode_cursor(pub_date, pk):
+    return f'{pub_date.isoformat()}_{pk}'
+
+
+def decode_cursor(cursor):
+    pub_date, _, pk = (cursor or '').rpartition('_')
+    try:
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except ValueError:
+        return None
+    return (pub_date, pk) if pub_date else None
+
+
+def tag_page(tag, cursor=None, size=TAG_PAGE_SIZE):
+    """Посты тега после курсора и курсор следующей страницы."""
+    rows = TaggedPost.objects.filter(tag=tag).order_by('-pub_date', '-post')
+    after = decode_cursor(cursor)
+    if after is not None:
+        pub_date, pk = after
+        rows = rows.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post__lt=pk)
+        )
+    keys = list(rows.values_list('post_id', 'pub_date')[:size + 1])
+    ids = [pk for pk, _ in keys[:size]]
+    posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+    page = [posts[pk] for pk in ids if pk in posts]
+    # Курсор берётся из строки индекса, а не из поста: пост могли уже
+    # удалить, а листать нужно дальше последней прочитанной строки.
+    next_cursor = None
+    if len(keys) > size:
+        pk, pub_date = keys[size - 1]
+        next_cursor = encode_cursor(pub_date, pk)
+    return page, next_cursor
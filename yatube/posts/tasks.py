@@ -0,0 +1,59 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.taskqueue import extend_lock, task
+
+from .deletion import delete_user, purge_deleted
+from .digests import send_digests
+from .models import Post, User
+from .notifications import build_notifications
+from .signals import purge_image
+from .sitemaps import build_sitemaps
+
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+@task
+def warm_thumbnails(post_id):
+    """Создаёт миниатюру заранее, чтобы первый просмотр её не ждал."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(
+            post.image, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+        )
+
+
+@task(max_attempts=1)
+def send_email_digests():
+    send_digests()
+
+
+@task
+def rebuild_sitemap():
+    build_sitemaps(settings.SITEMAP_ROOT, settings.SITE_URL)
+
+
+@task(max_attempts=1)
+def deliver_notifications():
+    build_notifications()
+
+
+@task(max_attempts=1)
+def purge_deleted_rows():
+    purge_deleted()
+
+
+@task
+def purge_images(names):
+    """Удаляет файлы и миниатюры картинок, на которые больше нет ссылок."""
+    for name in names:
+        purge_image(name)
+
+
+@task
+def delete_user_data(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        # Большой аккаунт удаляется дольше TASK_VISIBILITY_TIMEOUT:
+        # блокировка продлевается после каждой пачки.
+        delete_user(user, progress=lambda name, done: extend_lock())
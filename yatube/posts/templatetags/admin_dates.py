@@ -0,0 +1,112 @@
+"""Навигация по датам в админке без DISTINCT по всей таблице.
+
+Стандартный тег date_hierarchy собирает годы, месяцы и дни запросом
+DISTINCT по усечённым датам, а с USE_TZ усечение идёт через функцию,
+и индекс по pub_date не помогает: читается вся таблица. Здесь границы
+берутся из MIN и MAX — двух поисков по индексу, — а годы, месяцы и дни
+между ними перечисляются в Python. Пустые периоды тоже попадают в
+список; переход по ссылке — это диапазон по тому же индексу.
+"""
+import calendar
+import datetime
+
+from django import template
+from django.db.models import Max, Min
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+def _bounds(cl, field_name):
+    dates = cl.queryset.aggregate(first=Min(field_name), last=Max(field_name))
+    if dates['first'] is None:
+        return None, None
+    return (
+        timezone.localtime(dates['first']).date(),
+        timezone.localtime(dates['last']).date(),
+    )
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def indexed_date_hierarchy(cl):
+    field_name = cl.date_hierarchy
+    year_field = f'{field_name}__year'
+    month_field = f'{field_name}__month'
+    day_field = f'{field_name}__day'
+    year = cl.params.get(year_field)
+    month = cl.params.get(month_field)
+    day = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{field_name}__'])
+
+    first, last = _bounds(cl, field_name)
+    if first is None and not year:
+        return {'show': False}
+    if not (year or month or day) and first.year == last.year:
+        year = first.year
+        if first.month == last.month:
+            month = first.month
+    if year and month and day:
+        date = datetime.date(int(year), int(month), int(day))
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: year, month_field: month}),
+                'title': capfirst(formats.date_format(
+                    date, 'YEAR_MONTH_FORMAT'
+                )),
+            },
+            'choices': [{'title': capfirst(formats.date_format(
+                date, 'MONTH_DAY_FORMAT'
+            ))}],
+        }
+    if year and month:
+        year, month = int(year), int(month)
+        days = range(1, calendar.monthrange(year, month)[1] + 1)
+        if first is not None:
+            days = [
+                number for number in days
+                if first <= datetime.date(year, month, number) <= last
+            ]
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year}), 'title': str(year)},
+            'choices': [{
+                'link': link({
+                    year_field: year, month_field: month, day_field: number
+                }),
+                'title': capfirst(formats.date_format(
+                    datetime.date(year, month, number), 'MONTH_DAY_FORMAT'
+                )),
+            } for number in days],
+        }
+    if year:
+        year = int(year)
+        months = range(1, 13)
+        if first is not None:
+            months = [
+                number for number in months
+                if (first.year, first.month) <= (year, number)
+                <= (last.year, last.month)
+            ]
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [{
+                'link': link({year_field: year, month_field: number}),
+                'title': capfirst(formats.date_format(
+                    datetime.date(year, number, 1), 'YEAR_MONTH_FORMAT'
+                )),
+            } for number in months],
+        }
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{
+            'link': link({year_field: str(number)}),
+            'title': str(number),
+        } for number in range(first.year, last.year + 1)],
+    }
@@ -0,0 +1,15 @@
+from django import template
+
+from posts.trending import trending_groups, trending_posts
+
+register = template.Library()
+
+SIDEBAR_COUNT = 5
+
+
+@register.inclusion_tag('posts/includes/trending_sidebar.html')
+def trending_sidebar():
+    return {
+        'trending_posts': trending_posts(SIDEBAR_COUNT),
+        'trending_groups': trending_groups(SIDEBAR_COUNT),
+    }
@@ -0,0 +1,155 @@
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..utils import ESTIMATE_THRESHOLD, EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(30):
+            author = User.objects.create_user(username=f'author{i}')
+            Post.objects.create(
+                text=f'пост номер {i}', author=author, group=cls.group
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow(self):
+        """Список постов не делает запросов на каждую строку."""
+        url = reverse('admin:posts_post_changelist')
+        # Первый запрос прогревает кэш сессии.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(
+            response.context['cl'].paginator, EstimatedCountPaginator
+        )
+        Post.objects.create(text='ещё один', author=self.admin)
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(url)
+        self.assertEqual(len(first), len(second))
+
+    def test_search(self):
+        """Поиск в админке находит посты по тексту."""
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'номер 17'}
+        )
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['пост номер 17']
+        )
+
+    def test_admin_edit_recorded_in_history(self):
+        """Правка текста в админке попадает в историю версий."""
+        post = Post.objects.get(text='пост номер 3')
+        response = self.client.post(
+            reverse('admin:posts_post_change', args=(post.pk,)),
+            {
+                'text': 'пост номер 3, правка',
+                'author': post.author_id,
+                'group': self.group.pk,
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(post.revisions.values_list('number', 'editor')),
+            [(1, post.author_id), (2, self.admin.pk)]
+        )
+
+    def test_autocomplete(self):
+        """Автор выбирается через автодополнение, а не из списка всех."""
+        response = self.client.get(
+            reverse('admin:posts_post_add')
+        )
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_date_hierarchy_without_distinct(self):
+        """Навигация по датам строится по MIN/MAX, без DISTINCT по датам."""
+        Post.objects.filter(text='пост номер 0').update(
+            pub_date=timezone.make_aware(datetime(2019, 5, 1))
+        )
+        url = reverse('admin:posts_post_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'DISTINCT' in query['sql']
+        ])
+        for year in range(2019, timezone.now().year + 1):
+            self.assertContains(response, f'pub_date__year={year}')
+        months = self.client.get(url, {'pub_date__year': 2019})
+        self.assertContains(months, 'pub_date__month=5')
+        self.assertNotContains(months, 'pub_date__month=6')
+
+    def test_postgres_search_uses_full_text(self):
+        """На PostgreSQL поиск идёт через to_tsvector, без DISTINCT."""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        with mock.patch('posts.admin.connections') as connections:
+            connections.__getitem__.return_value.vendor = 'postgresql'
+            queryset, use_distinct = model_admin.get_search_results(
+                request, Post.objects.all(), 'номер'
+            )
+        self.assertFalse(use_distinct)
+        self.assertIn('to_tsvector', str(queryset.query))
+        self.assertIn('plainto_tsquery', str(queryset.query))
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def paginator(self, rows):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        database = mock.MagicMock(vendor='postgresql')
+        cursor = database.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = ([{'Plan': {'Plan Rows': rows}}],)
+        return paginator, database, cursor
+
+    def test_estimate_on_postgres(self):
+        """Для большой таблицы число строк берётся из EXPLAIN."""
+        paginator, database, cursor = self.paginator(ESTIMATE_THRESHOLD * 5)
+        with mock.patch('posts.utils.connections', {'default': database}):
+            self.assertEqual(paginator.count, ESTIMATE_THRESHOLD * 5)
+        self.assertTrue(
+            cursor.execute.call_args[0][0].startswith('EXPLAIN (FORMAT JSON)')
+        )
+
+    def test_small_table_counted_exactly(self):
+        """Ниже порога и на других базах считается точный COUNT."""
+        author = User.objects.create_user(username='author')
+        for i in range(3):
+            Post.objects.create(text=f'пост {i}', author=author)
+        paginator, database, _ = self.paginator(5)
+        with mock.patch('posts.utils.connections', {'default': database}):
+            self.assertEqual(paginator.count, 3)
+        self.assertEqual(
+            EstimatedCountPaginator(Post.objects.all(), 10).count, 3
+        )
+
+    def test_filtered_changelist_counted_exactly(self):
+        """С фильтрами оценка не используется, даже для большой таблицы."""
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='пост', author=author)
+        paginator, database, cursor = self.paginator(ESTIMATE_THRESHOLD * 5)
+        paginator.object_list = Post.objects.filter(text='пост')
+        with mock.patch('posts.utils.connections', {'default': database}):
+            self.assertEqual(paginator.count, 1)
+        cursor.execute.assert_not_called()
@@ -0,0 +1,210 @@
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..archive import (
+    archive_path, archive_posts, get_archived_post, rewrite_month
+)
+from ..models import ArchivedPost, Comment, Group, Mention, Post
+from ..revisions import record_revision
+
+User = get_user_model()
+ARCHIVE_ROOT = tempfile.mkdtemp()
+OLD_DATE = timezone.make_aware(datetime(2020, 3, 15, 12, 0))
+
+
+@override_settings(ARCHIVE_ROOT=ARCHIVE_ROOT)
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.old = [
+            Post.objects.create(
+                text=f'старый пост {i}', author=cls.author, group=cls.group
+            ) for i in range(5)
+        ]
+        for i, post in enumerate(cls.old):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=OLD_DATE + timedelta(days=i)
+            )
+        Comment.objects.create(
+            post=cls.old[0], author=cls.reader, text='старый комментарий'
+        )
+        for i in range(8):
+            Post.objects.create(text=f'новый пост {i}', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(ARCHIVE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(ARCHIVE_ROOT, ignore_errors=True)
+
+    def test_old_posts_moved(self):
+        """Старые посты с комментариями уходят из горячей таблицы."""
+        archived = archive_posts(timezone.now() - timedelta(days=365), 2)
+        self.assertEqual(archived, 5)
+        self.assertEqual(Post.objects.count(), 8)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.count(), 5)
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('month', flat=True)),
+            {'2020-03'}
+        )
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEqual(group.posts_count, 5)
+
+    def test_append_only_chunks(self):
+        """Каждая пачка дописывается в файл месяца отдельным фрагментом."""
+        archive_posts(timezone.now() - timedelta(days=365), 2)
+        entries = list(ArchivedPost.objects.order_by('offset'))
+        offsets = sorted({entry.offset for entry in entries})
+        self.assertEqual(len(offsets), 3)
+        self.assertEqual(offsets[0], 0)
+        with open(archive_path('2020-03'), 'rb') as archive:
+            size = len(archive.read())
+        last = entries[-1]
+        self.assertEqual(last.offset + last.length, size)
+        for post in self.old:
+            archived = get_archived_post(post.pk)
+            self.assertEqual(archived.text, post.text)
+            self.assertEqual(archived.group, self.group)
+
+    def test_append_after_rewrite(self):
+        """После перепаковки месяц дописывается в файл нового поколения."""
+        archive_posts(OLD_DATE + timedelta(days=2))
+        rewrite_month('2020-03')
+        archive_posts(timezone.now() - timedelta(days=365))
+        entries = list(ArchivedPost.objects.order_by('offset'))
+        self.assertEqual({entry.generation for entry in entries}, {1})
+        with open(archive_path('2020-03', 1), 'rb') as archive:
+            size = len(archive.read())
+        self.assertEqual(entries[-1].offset + entries[-1].length, size)
+        for post in self.old:
+            self.assertEqual(get_archived_post(post.pk).text, post.text)
+
+    def test_post_detail_fallback(self):
+        """Страница поста читается из архива, но без формы комментария."""
+        archive_posts(timezone.now() - timedelta(days=365))
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old[0].pk,))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['post'].text, 'старый пост 0')
+        self.assertEqual(response.context['post'].pub_date, OLD_DATE)
+        self.assertContains(response, 'старый комментарий')
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=(self.old[0].pk,))
+        )
+        missing = self.client.get(reverse('posts:post_detail', args=(999,)))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_profile_fallback(self):
+        """Профиль листает сначала свежие посты, потом архивные."""
+        archive_posts(timezone.now() - timedelta(days=365))
+        url = reverse('posts:profile', args=(self.author.username,))
+        first = self.client.get(url)
+        self.assertEqual(first.context['page_obj'].paginator.count, 13)
+        self.assertEqual(
+            first.context['page_obj'][-1].text, 'старый пост 3'
+        )
+        second = self.client.get(url, {'page': 2})
+        self.assertEqual(
+            [post.text for post in second.context['page_obj']],
+            ['старый пост 2', 'старый пост 1', 'старый пост 0']
+        )
+
+    def test_history_and_mentions_kept(self):
+        """История правок и упоминания переезжают в архив вместе с постом."""
+        post = Post.objects.get(pk=self.old[1].pk)
+        post.text = 'старый пост 1 для @reader'
+        post.save()
+        record_revision(post, 'старый пост 1', self.author)
+        self.assertTrue(Mention.objects.filter(post=post).exists())
+        archive_posts(timezone.now() - timedelta(days=365))
+        self.assertFalse(Mention.objects.exists())
+        archived = get_archived_post(post.pk)
+        self.assertEqual(archived.archived_mentions, [self.reader.pk])
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:post_history', args=(post.pk,))
+        )
+        self.assertEqual(
+            [text for _, text in response.context['revisions']],
+            ['старый пост 1 для @reader', 'старый пост 1']
+        )
+
+    def test_deleted_users_skipped(self):
+        """Комментарии и посты удалённых пользователей не ломают архив."""
+        archive_posts(timezone.now() - timedelta(days=365))
+        User.objects.filter(pk=self.reader.pk).delete()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old[0].pk,))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['comments'], [])
+        ArchivedPost.objects.filter(post_id=self.old[0].pk).update(
+            author=User.objects.create_user(username='other')
+        )
+        User.objects.filter(username='other').delete()
+        self.assertIsNone(get_archived_post(self.old[0].pk))
+
+
+@override_settings(ARCHIVE_ROOT=ARCHIVE_ROOT)
+class ArchiveRaceTest(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(ARCHIVE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='старый пост', author=self.author)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=OLD_DATE)
+
+    def test_late_comment_fails_batch(self):
+        """Комментарий, добавленный после чтения, не даёт удалить пост."""
+        append_chunk = archive.append_chunk
+
+        def comment_then_append(month, generation, records):
+            Comment.objects.create(
+                post=self.post, author=self.author, text='поздний'
+            )
+            return append_chunk(month, generation, records)
+
+        with mock.patch('posts.archive.append_chunk', comment_then_append):
+            with self.assertRaises(IntegrityError):
+                archive.archive_batch([self.post])
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+
+    def test_failed_batch_retried(self):
+        """Упавшая на внешнем ключе пачка перечитывается и переносится."""
+        archive_batch = archive.archive_batch
+        calls = []
+
+        def fail_once(posts):
+            calls.append(posts)
+            if len(calls) == 1:
+                raise IntegrityError
+            return archive_batch(posts)
+
+        with mock.patch('posts.archive.archive_batch', fail_once):
+            archived = archive_posts(timezone.now() - timedelta(days=365))
+        self.assertEqual(archived, 1)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(get_archived_post(self.post.pk).text, 'старый пост')
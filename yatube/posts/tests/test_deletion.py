@@ -0,0 +1,240 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import follow_graph
+from ..archive import archive_path, archive_posts
+from ..deletion import delete_user, purge_deleted, soft_delete_post
+from ..models import (
+    ArchivedPost, Comment, Follow, Group, ImageBlob, Mention, Notification,
+    Post, TaggedPost
+)
+from ..notifications import build_notifications, unread_count
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ARCHIVE_ROOT = os.path.join(TEMP_MEDIA_ROOT, 'archive')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SoftDeleteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='пост #тег',
+            author=cls.author,
+            group=cls.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def delete_post(self, user):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('posts:post_delete', args=(self.post.pk,))
+        )
+
+    def test_only_author_deletes(self):
+        """Удалить пост может только автор и только POST-запросом."""
+        self.assertEqual(self.delete_post(self.reader).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:post_delete', args=(self.post.pk,))
+            ).status_code,
+            405
+        )
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_soft_delete_hides_post(self):
+        """Помеченный пост пропадает из лент и счётчиков, но строка жива."""
+        response = self.delete_post(self.author)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(Post.all_objects.get(pk=self.post.pk).is_deleted)
+        self.assertFalse(TaggedPost.objects.exists())
+        self.assertEqual(Group.objects.get().posts_count, 0)
+        detail = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertEqual(detail.status_code, 404)
+        group_page = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,))
+        )
+        self.assertEqual(len(group_page.context['page_obj']), 0)
+
+    def test_soft_delete_drops_mentions_and_notifications(self):
+        """Удалённые пост и комментарий пропадают из уведомлений."""
+        post = Post.objects.create(
+            text='привет, @reader', author=self.author
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='ответ'
+        )
+        build_notifications()
+        self.assertEqual(unread_count(self.reader.pk), 1)
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse('posts:comment_delete', args=(post.pk, comment.pk))
+        )
+        self.assertFalse(Notification.objects.filter(
+            kind=Notification.COMMENT, source_id=comment.pk
+        ).exists())
+        soft_delete_post(post)
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+        self.assertFalse(Notification.objects.filter(post=post).exists())
+        build_notifications()
+        self.assertFalse(Notification.objects.filter(post=post).exists())
+
+    def test_purge(self):
+        """Фоновая чистка удаляет строки и отпускает картинку один раз."""
+        self.delete_post(self.author)
+        self.assertEqual(purge_deleted(batch_size=1), 1)
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertEqual(Group.objects.get().posts_count, 0)
+        self.assertEqual(ImageBlob.objects.get().refs, 0)
+
+    def test_comment_delete_by_post_author(self):
+        """Автор поста может скрыть чужой комментарий."""
+        self.client.force_login(self.author)
+        self.client.post(reverse(
+            'posts:comment_delete', args=(self.post.pk, self.comment.pk)
+        ))
+        self.assertFalse(self.post.comments.exists())
+        self.assertTrue(Comment.all_objects.get().is_deleted)
+        self.assertEqual(purge_deleted(), 1)
+        self.assertFalse(Comment.all_objects.exists())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, ARCHIVE_ROOT=ARCHIVE_ROOT,
+    TASK_QUEUE_EAGER=True
+)
+class DeleteUserTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='prolific')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.image = Post.objects.create(
+            text='с картинкой',
+            author=self.user,
+            group=self.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        ).image.path
+        for i in range(6):
+            post = Post.objects.create(
+                text=f'пост #{i} для @other', author=self.user,
+                group=self.group
+            )
+            Comment.objects.create(post=post, author=self.other, text='+')
+        other_post = Post.objects.create(text='чужой', author=self.other)
+        Comment.objects.create(post=other_post, author=self.user, text='+')
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        build_notifications()
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_batched_delete(self):
+        """Пользователь удаляется пачками вместе со всем, что с ним связано."""
+        self.assertEqual(follow_graph.follower_count(self.other.pk), 1)
+        reports = []
+        delete_user(
+            self.user, batch_size=4,
+            progress=lambda name, done: reports.append((str(name), done))
+        )
+        self.assertFalse(User.objects.filter(username='prolific').exists())
+        self.assertEqual(
+            list(Post.all_objects.values_list('text', flat=True)), ['чужой']
+        )
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(Group.objects.get().posts_count, 0)
+        self.assertEqual(follow_graph.follower_count(self.other.pk), 0)
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.image))
+        post_reports = [done for name, done in reports if name == 'posts']
+        self.assertEqual(post_reports, [4, 7])
+
+    def test_archived_posts_released(self):
+        """Архивные посты отдают картинки, счётчики групп и место в файле."""
+        kept = Post.objects.create(text='старый чужой', author=self.other)
+        Post.all_objects.update(pub_date=timezone.now() - timedelta(days=400))
+        archive_posts(timezone.now() - timedelta(days=365))
+        month = ArchivedPost.objects.get(post_id=kept.pk).month
+        self.assertEqual(Group.objects.get().posts_count, 7)
+        delete_user(self.user)
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('author', flat=True)),
+            {self.other.pk}
+        )
+        self.assertEqual(Group.objects.get().posts_count, 0)
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.image))
+        generation = ArchivedPost.objects.get(post_id=kept.pk).generation
+        self.assertEqual(generation, 1)
+        self.assertFalse(os.path.exists(archive_path(month)))
+        with gzip.open(archive_path(month, generation), 'rt') as archive:
+            data = archive.read()
+        self.assertIn('старый чужой', data)
+        self.assertNotIn('для @other', data)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:post_detail', args=(kept.pk,))
+            ).status_code,
+            200
+        )
+
+    def test_admin_delete_queued(self):
+        """Удаление из админки уходит в фоновую задачу."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:auth_user_delete', args=(self.user.pk,)),
+            {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(User.objects.filter(username='prolific').exists())
+        self.assertFalse(Post.all_objects.filter(author=self.user).exists())
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from ..digests import send_digests
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@yatube.ru'
+            )
+            for i in range(3)
+        ]
+        for reader in cls.readers[:2]:
+            Follow.objects.create(user=reader, author=cls.author)
+        Post.objects.create(text='новый пост', author=cls.author)
+
+    def test_one_email_per_follower(self):
+        """Каждый подписчик получает одно письмо с новыми постами."""
+        sent = send_digests()
+        self.assertEqual(sent, 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['reader0@yatube.ru', 'reader1@yatube.ru']
+        )
+        self.assertIn('новый пост', mail.outbox[0].body)
+
+    def test_posts_not_repeated(self):
+        """Уже отправленные посты не попадают в следующий дайджест."""
+        now = timezone.now()
+        send_digests(now=now)
+        mail.outbox.clear()
+        self.assertEqual(send_digests(now=now + timedelta(hours=1)), 0)
+
+    def test_queries_per_batch(self):
+        """На пачку пользователей — постоянное число запросов."""
+        with self.assertNumQueries(4):
+            send_digests(batch_size=10)
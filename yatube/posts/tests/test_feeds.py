@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(
+            text='первый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_available(self):
+        """Ленты главной, группы и автора отдаются в RSS и Atom."""
+        urls = (
+            reverse('posts:index_feed'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_feed', args=('group',)),
+            reverse('posts:group_atom', args=('group',)),
+            reverse('posts:profile_feed', args=('author',)),
+            reverse('posts:profile_atom', args=('author',)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('первый пост', response.content.decode())
+
+    def test_etag_not_modified(self):
+        """Совпавший ETag возвращает 304."""
+        url = reverse('posts:index_feed')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_invalidated_on_new_post(self):
+        """Новый пост сбрасывает кэш лент."""
+        url = reverse('posts:group_feed', args=('group',))
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            text='второй пост', author=self.author, group=self.group
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('второй пост', response.content.decode())
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы возвращает 404."""
+        response = self.client.get(
+            reverse('posts:group_feed', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowGraphTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_index_updated_on_follow_and_unfollow(self):
+        """Индекс подписок обновляется при подписке и отписке."""
+        self.assertFalse(
+            follow_graph.is_following(self.user.id, self.author.id)
+        )
+        self.client.get(reverse('posts:profile_follow', args=('writer',)))
+        self.assertTrue(
+            follow_graph.is_following(self.user.id, self.author.id)
+        )
+        self.assertEqual(follow_graph.follower_count(self.author.id), 1)
+        self.client.get(reverse('posts:profile_unfollow', args=('writer',)))
+        self.assertFalse(
+            follow_graph.is_following(self.user.id, self.author.id)
+        )
+        self.assertEqual(follow_graph.follower_count(self.author.id), 0)
+
+    def test_repeated_follow_is_ignored(self):
+        """Повторная подписка не создаёт дубль."""
+        for _ in range(2):
+            self.client.get(
+                reverse('posts:profile_follow', args=('writer',))
+            )
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_change_rebuilds_from_database(self):
+        """После подписки индекс собирается из базы, а не правится на месте."""
+        other = User.objects.create_user(username='other')
+        self.assertEqual(follow_graph.follower_count(self.author.id), 0)
+        Follow.objects.create(user=other, author=self.author)
+        follow_graph.follow(self.user.id, self.author.id)
+        self.assertEqual(
+            list(follow_graph.follower_ids(self.author.id)),
+            sorted([self.user.id, other.id])
+        )
+
+    def test_mutual_follows(self):
+        """Взаимные подписки считаются по индексу."""
+        follow_graph.follow(self.user.id, self.author.id)
+        self.assertEqual(follow_graph.mutual_follow_ids(self.user.id), [])
+        follow_graph.follow(self.author.id, self.user.id)
+        self.assertEqual(
+            follow_graph.mutual_follow_ids(self.user.id), [self.author.id]
+        )
+
+
+class FollowSuggestionTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader, self.friend, self.stranger = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'stranger')
+        )
+
+    def test_friend_of_friend_suggested(self):
+        """Автор, на которого подписан друг, попадает в рекомендации."""
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.stranger)
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        suggested = FollowSuggestion.objects.filter(
+            user=self.reader
+        ).values_list('suggested', flat=True)
+        self.assertEqual(list(suggested), [self.stranger.id])
+
+    def test_suggestions_shown_on_follow_page(self):
+        """Рекомендации выводятся на странице подписок."""
+        FollowSuggestion.objects.create(
+            user=self.reader, suggested=self.stranger, score=1
+        )
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [s.suggested for s in response.context['suggestions']],
+            [self.stranger]
+        )
@@ -1,7 +1,11 @@
+import hashlib
 import shutil
 import tempfile
+from unittest import mock
 
-from posts.models import Group, Post, User, Comment
+from posts.models import Group, ImageBlob, Post, User, Comment
+from posts.signals import purge_image
+from posts.storage import ContentAddressedStorage, content_addressed_name
 from django.conf import settings
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -32,6 +36,9 @@ class PostCreateFormTest(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        cls.image_name = content_addressed_name(
+            'posts/small.gif', hashlib.sha256(cls.small_gif).hexdigest()
+        )
 
         uploaded = SimpleUploadedFile(
             name='small.gif',
@@ -88,6 +95,93 @@ class PostCreateFormTest(TestCase):
             ).exists()
         )
 
+    def test_same_image_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом со счётчиком ссылок."""
+        uploaded = SimpleUploadedFile(
+            name='copy.gif',
+            content=self.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'копия',
+            'image': uploaded
+        })
+        post = Post.objects.get(text='копия')
+        self.assertEqual(post.image.name, self.image_name)
+        blob = ImageBlob.objects.get(name=self.image_name)
+        self.assertEqual(blob.refs, 2)
+        post.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.refs, 1)
+        self.assertTrue(post.image.storage.exists(self.image_name))
+
+    def upload_copy(self, text):
+        uploaded = SimpleUploadedFile(
+            name='copy.gif',
+            content=self.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': text,
+            'image': uploaded
+        })
+        return Post.objects.get(text=text)
+
+    def test_concurrent_upload_keeps_content_name(self):
+        """Параллельная загрузка того же файла не получает суффикс."""
+        with mock.patch.object(
+            ContentAddressedStorage, 'exists', return_value=False
+        ):
+            post = self.upload_copy('гонка')
+        self.assertEqual(post.image.name, self.image_name)
+        self.assertEqual(ImageBlob.objects.get(name=self.image_name).refs, 2)
+
+    def test_purge_during_upload_keeps_file(self):
+        """Очистка файла без ссылок не удаляет только что загруженный."""
+        Post.objects.filter(pk=self.post.pk).delete()
+        ImageBlob.objects.filter(name=self.image_name).update(refs=0)
+        real_exists = ContentAddressedStorage.exists
+
+        def exists_then_purge(storage, name):
+            result = real_exists(storage, name)
+            purge_image(name)
+            return result
+
+        with mock.patch.object(
+            ContentAddressedStorage, 'exists', exists_then_purge
+        ):
+            post = self.upload_copy('после очистки')
+        self.assertTrue(post.image.storage.exists(self.image_name))
+        self.assertEqual(ImageBlob.objects.get(name=self.image_name).refs, 1)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_too_large_image_rejected(self):
+        """Картинка больше лимита байт отклоняется при загрузке."""
+        self.assert_upload_rejected()
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1)
+    def test_too_many_pixels_rejected(self):
+        """Картинка больше лимита пикселей отклоняется по заголовку."""
+        self.assert_upload_rejected()
+
+    def test_not_image_rejected(self):
+        """Файл без заголовка картинки отклоняется."""
+        self.assert_upload_rejected(b'not an image at all')
+
+    def assert_upload_rejected(self, content=None):
+        uploaded = SimpleUploadedFile(
+            name='small.gif',
+            content=content or self.small_gif,
+            content_type='image/gif'
+        )
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'отклонено', 'image': uploaded}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors.get('image'))
+        self.assertFalse(Post.objects.filter(text='отклонено').exists())
+
     def test_post_edit(self):
         """При редактировании поста запись меняется в БД."""
         posts_count = Post.objects.count()
@@ -118,7 +212,7 @@ class PostCreateFormTest(TestCase):
             reverse('posts:index')
         )
         post = response.context['page_obj'][0].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.image_name)
 
     def test_img_profile(self):
         """В profile изображение передается в словаре context."""
@@ -129,7 +223,7 @@ class PostCreateFormTest(TestCase):
             )
         )
         post = response.context['page_obj'][0].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.image_name)
 
     def test_img_group(self):
         """В profile изображение передается в словаре context."""
@@ -140,7 +234,7 @@ class PostCreateFormTest(TestCase):
             )
         )
         group = response.context['page_obj'][0].image.name
-        self.assertEqual(group, 'posts/small.gif')
+        self.assertEqual(group, self.image_name)
 
     def test_img_post_detail(self):
         """В post_detail изображение передается в словаре context."""
@@ -151,7 +245,7 @@ class PostCreateFormTest(TestCase):
             )
         )
         post_detail = response.context['post'].image.name
-        self.assertEqual(post_detail, 'posts/small.gif')
+        self.assertEqual(post_detail, self.image_name)
 
 
 class CommentFormTest(TestCase):
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Notification, Post
+from ..notifications import build_notifications, unread_count
+
+User = get_user_model()
+
+
+class NotificationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        cls.post = Post.objects.create(text='пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_paths_do_not_write(self):
+        """Комментарий и подписка сами уведомлений не создают."""
+        self.client.force_login(self.readers[0])
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'комментарий'}
+        )
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(build_notifications(), 2)
+        self.assertEqual(unread_count(self.author.pk), 2)
+
+    def test_rerun_is_idempotent(self):
+        """Перекрытие окна не создаёт дублей, свой комментарий пропускается."""
+        Comment.objects.create(
+            post=self.post, author=self.readers[0], text='1'
+        )
+        Comment.objects.create(post=self.post, author=self.author, text='2')
+        build_notifications()
+        build_notifications(now=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_inbox_collapses_and_marks_read(self):
+        """Однотипные события сворачиваются, после просмотра всё прочитано."""
+        for reader in self.readers:
+            Comment.objects.create(post=self.post, author=reader, text='+')
+            Comment.objects.create(post=self.post, author=reader, text='++')
+            Follow.objects.create(user=reader, author=self.author)
+        build_notifications()
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Уведомления (15)')
+        response = self.client.get(reverse('posts:notifications'))
+        groups = response.context['groups']
+        self.assertEqual(len(groups), 2)
+        comments = next(g for g in groups if g['kind'] == 'comment')
+        self.assertEqual(comments['people'], 5)
+        self.assertEqual(len(comments['actors']), 3)
+        self.assertContains(response, 'и ещё 2')
+        self.assertEqual(unread_count(self.author.pk), 0)
+
+    def test_only_shown_groups_marked_read(self):
+        """Прочитанными становятся только группы открытой страницы."""
+        posts = [
+            Post.objects.create(text=f'пост {i}', author=self.author)
+            for i in range(12)
+        ]
+        now = timezone.now()
+        for i, post in enumerate(posts):
+            for reader in self.readers:
+                Comment.objects.create(
+                    post=post, author=reader, text='+'
+                )
+            Comment.objects.filter(post=post).update(
+                created=now - timedelta(minutes=len(posts) - i)
+            )
+        build_notifications()
+        self.client.force_login(self.author)
+        url = reverse('posts:notifications')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertEqual(unread_count(self.author.pk), 2 * 5)
+        notification_queries = [
+            query for query in queries.captured_queries
+            if 'FROM "posts_notification"' in query['sql']
+        ]
+        self.assertEqual(len(notification_queries), 4)
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['groups']), 2)
+        self.assertEqual(unread_count(self.author.pk), 0)
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..revisions import (
+    SNAPSHOT_EVERY, apply_diff, make_diff, record_revision, revision_text
+)
+
+User = get_user_model()
+
+
+class RevisionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='раз два три', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_diff_roundtrip(self):
+        """Разница восстанавливает новый текст из старого."""
+        old = 'Вот  такой\nтекст поста'
+        new = 'Вот другой\nтекст поста, длиннее'
+        self.assertEqual(apply_diff(old, make_diff(old, new)), new)
+
+    def test_edit_records_history(self):
+        """Правка поста сохраняет и исходный, и новый текст."""
+        self.client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            {'text': 'раз два четыре'}
+        )
+        self.assertEqual(revision_text(self.post, 1), 'раз два три')
+        self.assertEqual(revision_text(self.post, 2), 'раз два четыре')
+        response = self.client.get(
+            reverse('posts:post_history', args=(self.post.pk,))
+        )
+        texts = [text for _, text in response.context['revisions']]
+        self.assertEqual(texts, ['раз два четыре', 'раз два три'])
+
+    def test_snapshots_bound_reconstruction(self):
+        """Каждая SNAPSHOT_EVERY-я версия хранится целиком."""
+        old = self.post.text
+        for i in range(SNAPSHOT_EVERY + 2):
+            self.post.text = f'{old} {i}'
+            self.post.save()
+            record_revision(self.post, old, self.author)
+            old = self.post.text
+        snapshot = self.post.revisions.get(number=SNAPSHOT_EVERY + 1)
+        self.assertTrue(snapshot.is_snapshot)
+        last = self.post.revisions.count()
+        with self.assertNumQueries(1):
+            self.assertEqual(revision_text(self.post, last), self.post.text)
+
+    def test_text_changed_outside_view(self):
+        """Правка в обход view не рвёт цепочку разниц."""
+        edit_url = reverse('posts:post_edit', args=(self.post.pk,))
+        self.client.post(edit_url, {'text': 'a b d'})
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'x y z'
+        post.save()
+        self.client.post(edit_url, {'text': 'x y z w'})
+        Post.objects.filter(pk=self.post.pk).update(text='без истории')
+        self.client.post(edit_url, {'text': 'без истории и с ней'})
+        texts = [
+            revision_text(self.post, number)
+            for number in range(1, self.post.revisions.count() + 1)
+        ]
+        self.assertEqual(texts, [
+            'раз два три', 'a b d', 'x y z', 'x y z w', 'без истории',
+            'без истории и с ней'
+        ])
+
+    def test_history_hidden_from_others(self):
+        """Чужую историю правок смотреть нельзя."""
+        other = User.objects.create_user(username='other')
+        self.client.force_login(other)
+        response = self.client.get(
+            reverse('posts:post_history', args=(self.post.pk,))
+        )
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import Group, Post
+from ..sitemaps import build_sitemaps
+
+User = get_user_model()
+SITEMAP_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(3):
+            Post.objects.create(text=f'пост {i}', author=author, group=group)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+
+    def test_split_into_files(self):
+        """Адреса делятся на файлы, а индекс ссылается на каждый."""
+        names = build_sitemaps(SITEMAP_ROOT, 'http://testserver', 2)
+        # Главная, каталог групп, группа, профиль и три поста.
+        self.assertEqual(len(names), 5)
+        index = self.client.get('/sitemap.xml')
+        self.assertEqual(index.status_code, 200)
+        content = b''.join(index.streaming_content).decode()
+        self.assertIn('http://testserver/sitemap-4.xml', content)
+        part = self.client.get('/sitemap-4.xml')
+        self.assertIn(
+            '/posts/', b''.join(part.streaming_content).decode()
+        )
+
+    def test_stale_parts_removed(self):
+        """Лишние части от прошлой сборки удаляются."""
+        build_sitemaps(SITEMAP_ROOT, 'http://testserver', 1)
+        build_sitemaps(SITEMAP_ROOT, 'http://testserver')
+        self.assertEqual(self.client.get('/sitemap-2.xml').status_code, 404)
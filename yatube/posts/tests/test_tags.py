@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Mention, Post, Tag, TaggedPost
+from ..tags import parse_mentions, parse_tags, tag_page
+
+User = get_user_model()
+
+
+class TagsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_parse(self):
+        """Теги приводятся к нижнему регистру, точка после имени отсекается."""
+        self.assertEqual(
+            parse_tags('#Django и #python, но не a#b и не &#39;'),
+            {'django', 'python'}
+        )
+        self.assertEqual(
+            parse_mentions('привет, @reader. И mail@example.com'),
+            {'reader'}
+        )
+
+    def test_index_on_save_and_edit(self):
+        """Индекс тегов и упоминаний следует за текстом поста."""
+        post = Post.objects.create(
+            text='#django для @reader и @nobody', author=self.author
+        )
+        self.assertEqual(
+            list(post.tagged.values_list('tag__name', flat=True)),
+            ['django']
+        )
+        self.assertEqual(
+            list(Mention.objects.values_list('user__username', flat=True)),
+            ['reader']
+        )
+        post.text = '#python без упоминаний'
+        post.save()
+        self.assertEqual(
+            list(post.tagged.values_list('tag__name', flat=True)),
+            ['python']
+        )
+        self.assertFalse(Mention.objects.exists())
+
+    def test_keyset_pages(self):
+        """Лента тега листается по курсору без пропусков и повторов."""
+        now = timezone.now()
+        posts = []
+        for i in range(25):
+            post = Post.objects.create(text=f'#лента {i}', author=self.author)
+            pub_date = now - timedelta(minutes=i // 2)
+            Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+            TaggedPost.objects.filter(post=post).update(pub_date=pub_date)
+            posts.append(post.pk)
+        tag = Tag.objects.get(name='лента')
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = tag_page(tag, cursor)
+            seen.extend(post.pk for post in page)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), set(posts))
+        response = self.client.get(reverse('posts:tag', args=('Лента',)))
+        self.assertEqual(len(response.context['posts']), 10)
+        second = self.client.get(
+            reverse('posts:tag', args=('лента',)),
+            {'after': response.context['next_cursor']}
+        )
+        self.assertEqual(
+            [post.pk for post in second.context['posts']], seen[10:20]
+        )
+
+    def test_cursor_skips_missing_posts(self):
+        """Пропавшие из таблицы постов строки не ломают курсор."""
+        now = timezone.now()
+        posts = []
+        for i in range(6):
+            post = Post.objects.create(text=f'#лента {i}', author=self.author)
+            pub_date = now - timedelta(minutes=i)
+            Post.objects.filter(pk=post.pk).update(pub_date=pub_date)
+            TaggedPost.objects.filter(post=post).update(pub_date=pub_date)
+            posts.append(post.pk)
+        Post.all_objects.filter(pk__in=posts[1:4]).update(is_deleted=True)
+        tag = Tag.objects.get(name='лента')
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = tag_page(tag, cursor, size=2)
+            pages.append([post.pk for post in page])
+            if cursor is None:
+                break
+        self.assertEqual(pages, [[posts[0]], [], [posts[4], posts[5]]])
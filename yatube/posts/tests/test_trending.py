@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..deletion import soft_delete_post
+from ..models import Comment, Group, Post, TrendingGroup, TrendingPost
+from ..trending import update_trending
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.quiet = Post.objects.create(text='тихий', author=cls.author)
+        cls.hot = Post.objects.create(
+            text='горячий', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, count):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.author, text='!')
+
+    def test_commented_post_ranks_higher(self):
+        """Пост с комментариями поднимается выше в рейтинге."""
+        self.comment(self.hot, 3)
+        update_trending()
+        ranking = list(TrendingPost.objects.values_list('post', flat=True))
+        self.assertEqual(ranking[0], self.hot.pk)
+        self.assertTrue(TrendingGroup.objects.filter(group=self.group))
+
+    def test_incremental_run_counts_only_new_comments(self):
+        """Повторный запуск не пересчитывает старые комментарии заново."""
+        now = timezone.now()
+        self.comment(self.hot, 2)
+        update_trending(now + timedelta(seconds=1))
+        first = TrendingPost.objects.get(post=self.hot).score
+        update_trending(now + timedelta(seconds=2))
+        second = TrendingPost.objects.get(post=self.hot).score
+        self.assertLessEqual(second, first)
+
+    def test_trending_page(self):
+        """Страница популярного читает готовый рейтинг."""
+        self.comment(self.hot, 1)
+        update_trending()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            response.context['trending_posts'][0].post, self.hot
+        )
+
+    def test_deleted_post_not_returned(self):
+        """Удалённый пост не возвращается в рейтинг следующим запуском."""
+        now = timezone.now()
+        self.comment(self.hot, 2)
+        soft_delete_post(self.hot)
+        update_trending(now + timedelta(seconds=1))
+        self.assertFalse(TrendingPost.objects.filter(post=self.hot).exists())
+        response = self.client.get(reverse('posts:trending'))
+        self.assertNotIn(
+            self.hot.pk,
+            [row.post_id for row in response.context['trending_posts']]
+        )
+
+    def test_late_commit_counted_once(self):
+        """Строка с отметкой до прошлого запуска учитывается, но один раз."""
+        now = timezone.now()
+        update_trending(now)
+        base = TrendingPost.objects.get(post=self.quiet).score
+        self.comment(self.quiet, 1)
+        Comment.objects.filter(post=self.quiet).update(
+            created=now - timedelta(minutes=1)
+        )
+        update_trending(now + timedelta(seconds=1))
+        first = TrendingPost.objects.get(post=self.quiet).score
+        self.assertGreater(first, base + 0.5)
+        update_trending(now + timedelta(seconds=2))
+        second = TrendingPost.objects.get(post=self.quiet).score
+        self.assertLessEqual(second, first)
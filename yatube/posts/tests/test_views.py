@@ -319,3 +319,98 @@ class FollowViewsTest(TestCase):
         response = self.authorized_client.get(
             reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 0)
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.quiet = Group.objects.create(
+            title='Тихая', slug='quiet', description='Описание'
+        )
+        cls.busy = Group.objects.create(
+            title='Активная', slug='busy', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_follow_posts(self):
+        """Счётчик постов группы меняется при создании, переносе и удалении."""
+        post = Post.objects.create(
+            text='текст', author=self.user, group=self.busy
+        )
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 1)
+        self.assertEqual(self.busy.last_post_at, post.pub_date)
+        post.group = self.quiet
+        post.save()
+        self.busy.refresh_from_db()
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 0)
+        self.assertIsNone(self.busy.last_post_at)
+        self.assertEqual(self.quiet.posts_count, 1)
+        post.delete()
+        self.quiet.refresh_from_db()
+        self.assertEqual(self.quiet.posts_count, 0)
+
+    def test_drifted_counter_not_negative(self):
+        """Разошедшийся счётчик не уходит ниже нуля и не ломает удаление."""
+        post = Post.objects.create(
+            text='текст', author=self.user, group=self.busy
+        )
+        Group.objects.filter(pk=self.busy.pk).update(posts_count=0)
+        post.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 0)
+
+    def test_group_index_sorted_by_activity(self):
+        """В каталоге групп сначала идут группы с недавними постами."""
+        self.client.get(reverse('posts:group_index'))
+        Post.objects.create(text='текст', author=self.user, group=self.busy)
+        response = self.client.get(reverse('posts:group_index'))
+        groups = response.context['page_obj']
+        self.assertEqual(groups[0]['slug'], 'busy')
+        self.assertEqual(groups[0]['posts_count'], 1)
+
+
+class GroupFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='в группе', author=cls.user, group=cls.group
+        )
+        Post.objects.create(text='в другой', author=cls.user, group=cls.other)
+        Post.objects.create(text='без группы', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_feed(self, slug='group'):
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': slug})
+        )
+        return [post.text for post in response.context['page_obj']]
+
+    def test_only_group_posts(self):
+        """Лента группы содержит только посты этой группы."""
+        self.assertEqual(self.get_feed(), ['в группе'])
+
+    def test_feed_invalidated_on_edit_and_move(self):
+        """Кэш ленты сбрасывается при правке и переносе поста."""
+        self.get_feed()
+        self.get_feed('other')
+        self.post.text = 'исправлено'
+        self.post.save()
+        self.assertEqual(self.get_feed(), ['исправлено'])
+        self.post.group = self.other
+        self.post.save()
+        self.assertEqual(self.get_feed(), [])
+        self.assertEqual(self.get_feed('other'), ['в другой', 'исправлено'])
@@ -0,0 +1,137 @@
+"""Рейтинг популярных постов и групп.
+
+Задача update_trending запускается периодически и обрабатывает только
+записи, появившиеся с прошлого запуска: накопленные оценки умножаются
+на коэффициент затухания за прошедшее время, к ним прибавляются новые
+комментарии и посты. Страницы читают готовые таблицы TrendingPost и
+TrendingGroup.
+
+created и pub_date ставятся до коммита, поэтому строка из долгой
+транзакции может появиться с отметкой раньше прошлого запуска. Окно
+чтения заходит на OVERLAP в прошлое, а id строк из перекрытия, уже
+учтённых прошлым запуском, хранятся в JobState.seen и второй раз не
+считаются.
+"""
+import json
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import (
+    Comment, Follow, JobState, Post, TrendingGroup, TrendingPost
+)
+
+JOB_NAME = 'trending'
+WINDOW = timedelta(days=3)
+HALF_LIFE = timedelta(hours=12)
+OVERLAP = timedelta(minutes=5)
+POST_WEIGHT = 0.5
+MIN_SCORE = 0.01
+TOP_COUNT = 20
+
+
+def decay(age):
+    return 0.5 ** (age / HALF_LIFE)
+
+
+def reach(author_ids):
+    """Множитель охвата: растёт с числом подписчиков автора."""
+    followers = dict(
+        Follow.objects.filter(author_id__in=author_ids)
+        .values_list('author_id').annotate(count=Count('id'))
+    )
+    return {
+        author_id: 1 + math.log1p(followers.get(author_id, 0))
+        for author_id in author_ids
+    }
+
+
+def _apply(model, key_field, increments):
+    """Прибавляет оценки: существующие строки обновляет, новые создаёт."""
+    existing = model.objects.in_bulk(list(increments))
+    for key, row in existing.items():
+        row.score += increments[key]
+    model.objects.bulk_update(existing.values(), ['score'])
+    model.objects.bulk_create(
+        model(**{key_field: key, 'score': score})
+        for key, score in increments.items() if key not in existing
+    )
+
+
+def update_trending(now=None):
+    now = now or timezone.now()
+    window_start = now - WINDOW
+    state, _ = JobState.objects.get_or_create(name=JOB_NAME)
+    since = window_start
+    if state.last_run and state.last_run - OVERLAP > window_start:
+        since = state.last_run - OVERLAP
+    seen = json.loads(state.seen or '{}')
+    seen_comments = set(seen.get('comments', ()))
+    seen_posts = set(seen.get('posts', ()))
+
+    comment_rows = list(
+        Comment.objects.filter(
+            created__gt=since, created__lte=now,
+            post__pub_date__gte=window_start, post__is_deleted=False
+        ).values_list('pk', 'post_id', 'post__author_id', 'created')
+    )
+    post_rows = list(
+        Post.objects.filter(pub_date__gt=since, pub_date__lte=now)
+        .values_list('id', 'author_id', 'group_id', 'pub_date')
+    )
+    comments = [
+        row[1:] for row in comment_rows if row[0] not in seen_comments
+    ]
+    posts = [row for row in post_rows if row[0] not in seen_posts]
+    overlap_start = now - OVERLAP
+    seen = {
+        'comments': [
+            row[0] for row in comment_rows if row[3] > overlap_start
+        ],
+        'posts': [row[0] for row in post_rows if row[3] > overlap_start],
+    }
+    reach_by_author = reach(
+        {row[1] for row in comments} | {row[1] for row in posts}
+    )
+
+    post_scores = {}
+    group_scores = {}
+    for post_id, author_id, created in comments:
+        post_scores[post_id] = post_scores.get(post_id, 0) + (
+            decay(now - created) * reach_by_author[author_id]
+        )
+    for post_id, author_id, group_id, pub_date in posts:
+        weight = decay(now - pub_date)
+        post_scores[post_id] = post_scores.get(post_id, 0) + (
+            POST_WEIGHT * weight * reach_by_author[author_id]
+        )
+        if group_id is not None:
+            group_scores[group_id] = group_scores.get(group_id, 0) + weight
+
+    with transaction.atomic():
+        if state.last_run:
+            factor = decay(now - state.last_run)
+            TrendingPost.objects.update(score=F('score') * factor)
+            TrendingGroup.objects.update(score=F('score') * factor)
+        _apply(TrendingPost, 'post_id', post_scores)
+        _apply(TrendingGroup, 'group_id', group_scores)
+        TrendingPost.objects.filter(post__pub_date__lt=window_start).delete()
+        TrendingPost.objects.filter(score__lt=MIN_SCORE).delete()
+        TrendingGroup.objects.filter(score__lt=MIN_SCORE).delete()
+        state.last_run = now
+        state.seen = json.dumps(seen)
+        state.save(update_fields=['last_run', 'seen'])
+    return len(post_scores), len(group_scores)
+
+
+def trending_posts(limit=TOP_COUNT):
+    return TrendingPost.objects.filter(
+        post__is_deleted=False
+    ).select_related('post__author', 'post__group')[:limit]
+
+
+def trending_groups(limit=TOP_COUNT):
+    return TrendingGroup.objects.select_related('group')[:limit]
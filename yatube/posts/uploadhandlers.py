@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import (
+    StopFutureHandlers, TemporaryFileUploadHandler
+)
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+HEADER_LIMIT = 256 * 1024
+
+
+class MediaTemporaryUploadedFile(TemporaryUploadedFile):
+    """Временный файл в MEDIA_ROOT: при сохранении его просто переименуют."""
+
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None):
+        directory = os.path.join(settings.MEDIA_ROOT, 'tmp')
+        os.makedirs(directory, exist_ok=True)
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + ext, dir=directory
+        )
+        UploadedFile.__init__(
+            self, file, name, content_type, size, charset, content_type_extra
+        )
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Принимает картинку поста потоком и проверяет её по заголовку.
+
+    Ограничения по байтам и пикселям проверяются до того, как файл
+    дочитан, а картинка не декодируется. Файл пишется сразу рядом с
+    итоговым местом в MEDIA_ROOT и попутно хэшируется для
+    ContentAddressedStorage.
+    """
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.active = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        self.active = field_name == 'image'
+        if not self.active:
+            return
+        super().new_file(field_name, *args, **kwargs)
+        self.file = MediaTemporaryUploadedFile(
+            self.file_name, self.content_type, 0,
+            self.charset, self.content_type_extra
+        )
+        self.digest = hashlib.sha256()
+        self.header = b''
+        self.image_info = None
+        self.error = None
+        self.received = 0
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if self.error:
+            return None
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            self.reject('Файл больше %d МБ.' % (
+                settings.POST_IMAGE_MAX_BYTES // (1024 * 1024)
+            ))
+            return None
+        if self.image_info is None:
+            self.header += raw_data[:HEADER_LIMIT]
+            self.read_header(final=len(self.header) >= HEADER_LIMIT)
+            if self.error:
+                return None
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        if self.image_info is None and not self.error:
+            self.read_header(final=True)
+        file = super().file_complete(file_size)
+        file.upload_error = self.error
+        file.content_hash = None if self.error else self.digest.hexdigest()
+        return file
+
+    def read_header(self, final):
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                self.image_info = (image.format, image.size)
+        except Image.DecompressionBombError:
+            self.reject('Слишком большое разрешение.')
+            return
+        except Exception:
+            if final:
+                self.reject('Загрузите правильное изображение.')
+            return
+        image_format, (width, height) = self.image_info
+        if image_format not in settings.POST_IMAGE_FORMATS:
+            self.reject('Формат %s не поддерживается.' % image_format)
+        elif width * height > settings.POST_IMAGE_MAX_PIXELS:
+            self.reject('Слишком большое разрешение: %dx%d.' % (
+                width, height
+            ))
+
+    def reject(self, message):
+        self.error = message
+        self.file.truncate(0)
+        self.file.seek(0)
+
+
+def stream_image_upload(view):
+    """Подключает ImageUploadHandler до разбора тела запроса.
+
+    Обработчик нужно добавить раньше, чем CsrfViewMiddleware прочитает
+    request.POST, поэтому проверка CSRF переносится внутрь.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+        return protected(request, *args, **kwargs)
+
+    return wrapper
@@ -1,8 +1,97 @@
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
 from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+POSTS_PER_PAGE = 10
+PAGE_CACHE_TIME = 60 * 15
+ESTIMATE_THRESHOLD = 10000
+
+
+class CachedPaginator(Paginator):
+    """Кэширует общее количество и объекты каждой страницы по ключу."""
+
+    def __init__(self, object_list, per_page, cache_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        key = f'{self.cache_key}:count'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, PAGE_CACHE_TIME)
+        return count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        key = f'{self.cache_key}:page:{number}'
+        objects = cache.get(key)
+        if objects is None:
+            bottom = (number - 1) * self.per_page
+            top = bottom + self.per_page
+            if top + self.orphans >= self.count:
+                top = self.count
+            objects = list(self.object_list[bottom:top])
+            cache.set(key, objects, PAGE_CACHE_TIME)
+        return self._get_page(objects, number, self)
+
+
+def where_sql(queryset):
+    query = queryset.query
+    try:
+        return query.get_compiler(queryset.db).compile(query.where)
+    except EmptyResultSet:
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для больших таблиц берёт число строк из оценки планировщика.
+
+    На PostgreSQL COUNT(*) по миллионам строк читает всю таблицу, а
+    EXPLAIN возвращает оценку сразу. Если оценка меньше
+    ESTIMATE_THRESHOLD, считаем точно; на других базах — всегда точно.
+    Выборку с фильтрами сверх менеджера по умолчанию тоже считаем
+    точно: для условий оценка планировщика бывает ошибочной в разы.
+    """
+
+    @cached_property
+    def count(self):
+        if self.is_filtered():
+            return super().count
+        estimate = self.estimate()
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
+
+    def is_filtered(self):
+        queryset = self.object_list
+        base = queryset.model._default_manager.all()
+        return where_sql(queryset) != where_sql(base)
+
+    def estimate(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
 
 
-def Create_Page(queryset, request):
-    paginator = Paginator(queryset, 10)
+def Create_Page(queryset, request, cache_key=None):
+    if cache_key is None:
+        paginator = Paginator(queryset, POSTS_PER_PAGE)
+    else:
+        paginator = CachedPaginator(queryset, POSTS_PER_PAGE, cache_key)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
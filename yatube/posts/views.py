@@ -1,13 +1,31 @@
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
-from .models import Group, Post, User, Follow
+from users.cache import get_user_or_404
+
+from .archive import ProfilePosts, get_archived_post
+from .deletion import soft_delete_comment, soft_delete_post
+from .models import Comment, Group, Post, Tag
+from .caching import versioned_key
+from .follow_graph import follow, follower_count, is_following, unfollow
 from .forms import CommentForm, PostForm
+from .groups import GROUP_FEED, group_directory
+from .notifications import describe, inbox, mark_read
+from .revisions import history
+from .tasks import warm_thumbnails
+from .tags import tag_page
+from .trending import trending_groups, trending_posts
+from .uploadhandlers import stream_image_upload
 from .utils import Create_Page
 
 
 CACHE_TIME = 20
+SUGGESTIONS_COUNT = 5
 
 
 @cache_page(CACHE_TIME, key_prefix='index_page')
@@ -16,37 +34,66 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    context = {
+        'trending_posts': trending_posts(),
+        'trending_groups': trending_groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    context = Create_Page(group_directory(), request)
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
+    posts = group.group_posts.select_related('author')
     context = {
         'group': group,
-        'posts': posts
     }
-    context.update(Create_Page(Post.objects.all(), request))
+    context.update(Create_Page(
+        posts, request, versioned_key(GROUP_FEED, group.pk)
+    ))
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = tag_page(tag, request.GET.get('after'))
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/tag.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author_id=author.id)
-    user = request.user
-    following = False
-    if (not user.is_anonymous) and Follow.objects.filter(
-        user=user, author=author
-    ).exists():
-        following = True
+    author = get_user_or_404(username)
+    following = (
+        request.user.is_authenticated
+        and is_following(request.user.id, author.id)
+    )
     context = {
         "author": author,
         "following": following,
+        "followers_count": follower_count(author.id),
     }
-    context.update(Create_Page(posts, request))
+    context.update(Create_Page(ProfilePosts(author), request))
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        post = get_archived_post(post_id)
+        if post is None:
+            raise Http404
+        comments = post.archived_comments
+    else:
+        comments = post.comments.all()
     form = CommentForm()
     context = {
         'post': post,
@@ -57,6 +104,7 @@ def post_detail(request, post_id):
 
 
 @login_required
+@stream_image_upload
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -66,6 +114,8 @@ def post_create(request):
         temp_form = form.save(commit=False)
         temp_form.author = request.user
         temp_form.save()
+        if temp_form.image:
+            warm_thumbnails.delay(post_id=temp_form.pk)
         return redirect(
             'posts:profile', temp_form.author
         )
@@ -73,19 +123,30 @@ def post_create(request):
 
 
 @login_required
+@stream_image_upload
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
-        return redirect(
-            'posts:post_detail', post_id
+    with transaction.atomic():
+        # Строка поста заблокирована до сохранения: параллельная правка
+        # подождёт и увидит уже новый текст.
+        post = get_object_or_404(
+            Post.objects.select_for_update(), pk=post_id
         )
-    form = PostForm(
-        request.POST or None,
-        files=request.FILES or None,
-        instance=post
-    )
-    if form.is_valid():
-        form.save()
+        if post.author != request.user:
+            return redirect(
+                'posts:post_detail', post_id
+            )
+        form = PostForm(
+            request.POST or None,
+            files=request.FILES or None,
+            instance=post
+        )
+        saved = form.is_valid()
+        if saved:
+            post._editor = request.user
+            post = form.save()
+    if saved:
+        if 'image' in form.changed_data and post.image:
+            warm_thumbnails.delay(post_id=post.pk)
         return redirect(
             'posts:post_detail', post_id
         )
@@ -101,6 +162,45 @@ def post_edit(request, post_id):
     )
 
 
+@login_required
+@require_POST
+def post_delete(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author != request.user:
+        raise PermissionDenied
+    soft_delete_post(post)
+    return redirect('posts:profile', request.user.username)
+
+
+@login_required
+@require_POST
+def comment_delete(request, post_id, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('post'),
+        pk=comment_id, post_id=post_id
+    )
+    if request.user not in (comment.author, comment.post.author):
+        raise PermissionDenied
+    soft_delete_comment(comment)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def post_history(request, post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        post = get_archived_post(post_id)
+        if post is None:
+            raise Http404
+    if post.author != request.user and not request.user.is_staff:
+        raise PermissionDenied
+    context = {
+        'post': post,
+        'revisions': history(post),
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
@@ -116,28 +216,31 @@ def add_comment(request, post_id):
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
     context = Create_Page(posts, request)
+    context['suggestions'] = request.user.follow_suggestions.select_related(
+        'suggested'
+    )[:SUGGESTIONS_COUNT]
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def notifications(request):
+    context = Create_Page(inbox(request.user.id), request)
+    groups = list(context['page_obj'])
+    mark_read(request.user.id, groups)
+    context['groups'] = describe(request.user.id, groups)
+    return render(request, 'posts/notifications.html', context)
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if request.user != author and not Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists():
-        Follow.objects.create(
-            user=get_object_or_404(User, username=request.user.username),
-            author=get_object_or_404(User, username=username)
-        )
+    author = get_user_or_404(username)
+    if request.user != author:
+        follow(request.user.id, author.id)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    unfollow = Follow.objects.get(
-        user=get_object_or_404(User, username=request.user.username),
-        author=get_object_or_404(User, username=username)
-    )
-    unfollow.delete()
+    author = get_user_or_404(username)
+    unfollow(request.user.id, author.id)
     return redirect('posts:profile', username)
@@ -0,0 +1,42 @@
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.tasks import delete_user_data
+
+User = get_user_model()
+
+
+class BackgroundDeleteUserAdmin(UserAdmin):
+    """Пользователи удаляются фоновой задачей, а не в запросе админки."""
+
+    def get_deleted_objects(self, objs, request):
+        # Полный обход связанных объектов для страницы подтверждения
+        # у крупных аккаунтов сам по себе не укладывается в таймаут.
+        objs = list(objs)
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(self.opts.verbose_name)
+        return (
+            [str(obj) for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            perms_needed,
+            []
+        )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, User.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        for user in User.objects.filter(pk__in=ids):
+            user.is_active = False
+            user.save(update_fields=('is_active',))
+            delete_user_data.delay(user_id=user.pk)
+        messages.info(
+            request, f'Удаление пользователей поставлено в очередь: {len(ids)}'
+        )
+
+
+admin.site.unregister(User)
+admin.site.register(User, BackgroundDeleteUserAdmin)
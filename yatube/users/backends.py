@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import PermissionDenied
+
+from .cache import get_cached_user
+from .hashing import run_hasher
+
+User = get_user_model()
+
+
+def verify_password(password, encoded):
+    """Проверяет пароль и сообщает, нужно ли пересчитать хэш."""
+    outdated = []
+    valid = check_password(password, encoded, outdated.append)
+    return valid, bool(outdated)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша, а хэши
+    паролей считает в пуле потоков.
+
+    Неудачный вход завершается PermissionDenied: иначе authenticate()
+    перешёл бы к следующему ModelBackend, и тот посчитал бы хэш ещё раз
+    в потоке запроса, мимо пула.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Хэш считается и для несуществующего имени, чтобы время
+            # ответа не выдавало, есть ли такой пользователь.
+            run_hasher(make_password, password)
+            raise PermissionDenied
+        valid, outdated = run_hasher(verify_password, password, user.password)
+        if not valid or not self.user_can_authenticate(user):
+            raise PermissionDenied
+        if outdated:
+            user.password = run_hasher(make_password, password)
+            user.save(update_fields=['password'])
+        return user
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is not None and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,103 @@
+"""Кэш пользователей для AuthenticationMiddleware и страниц профиля.
+
+В общем кэше лежит не pickle модели, а словарь значений её полей под
+ключом с id и версией формата записи: смена набора полей меняет
+версию, и старые записи просто перестают читаться. Запись удаляется
+сигналами при save() и delete() пользователя, в том числе при смене
+пароля и блокировке. Сброс виден другим процессам только через общий
+кэш, поэтому в продакшене он обязателен (core.E001). Массовый
+QuerySet.update() сигналов не шлёт: после него нужно вызвать
+invalidate_user для каждого затронутого пользователя.
+
+Имя пользователя отображается в id отдельным ключом. Несуществующие
+имена тоже кэшируются, коротко, чтобы перебор случайных профилей не
+доходил до базы; такая запись сбрасывается в общем кэше при
+регистрации и переименовании пользователя, так что новый профиль сразу
+открывается во всех процессах.
+"""
+from hashlib import sha1
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+User = get_user_model()
+
+USER_CACHE_VERSION = 2
+USER_CACHE_TIMEOUT = 60 * 60
+MISSING_TIMEOUT = 5 * 60
+MISSING = 0
+# Только то, что нужно проверке сессии, правам и страницам; остальные
+# поля отложены и при обращении читаются из базы.
+FIELDS = (
+    'id', 'username', 'password', 'is_active', 'is_staff', 'is_superuser',
+    'first_name', 'last_name',
+)
+
+
+def user_key(user_id):
+    return f'user:v{USER_CACHE_VERSION}:{user_id}'
+
+
+def username_key(username):
+    # Имя приходит из URL: в ключе memcached нельзя пробелы, не-ASCII
+    # и больше 250 символов, поэтому в ключ идёт хэш.
+    digest = sha1(username.encode()).hexdigest()
+    return f'username:v{USER_CACHE_VERSION}:{digest}'
+
+
+def _build(data):
+    # from_db ждёт значения в порядке полей модели, а не FIELDS.
+    names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in data
+    ]
+    return User.from_db(None, names, [data[name] for name in names])
+
+
+def get_cached_user(user_id):
+    """Пользователь по id или None, если такого нет."""
+    data = cache.get(user_key(user_id))
+    if data is None:
+        data = User.objects.filter(pk=user_id).values(*FIELDS).first()
+        if data is None:
+            return None
+        cache.set(user_key(user_id), data, USER_CACHE_TIMEOUT)
+    return _build(data)
+
+
+def get_user_by_username(username):
+    """Пользователь по имени или None; имя сверяется с записью по id."""
+    user_id = cache.get(username_key(username))
+    if user_id == MISSING:
+        return None
+    if user_id is not None:
+        user = get_cached_user(user_id)
+        if user is not None and user.username == username:
+            return user
+    data = User.objects.filter(username=username).values(*FIELDS).first()
+    if data is None:
+        cache.set(username_key(username), MISSING, MISSING_TIMEOUT)
+        return None
+    cache.set_many({
+        user_key(data['id']): data,
+        username_key(username): data['id'],
+    }, USER_CACHE_TIMEOUT)
+    return _build(data)
+
+
+def get_user_or_404(username):
+    user = get_user_by_username(username)
+    if user is None:
+        raise Http404
+    return user
+
+
+def invalidate_user(user_id, *usernames):
+    keys = [user_key(user_id)]
+    keys.extend(username_key(username) for username in usernames)
+    # Второй сброс после коммита убирает запись, которую успел положить
+    # параллельный запрос, прочитавший строку до коммита.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,11 +1,45 @@
-from django.contrib.auth.forms import UserCreationForm
+from django import forms
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from .hashing import HashingBusy, run_hasher
 
 
 User = get_user_model()
 
+BUSY_MESSAGE = 'Сейчас слишком много входов, попробуйте через минуту.'
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def _post_clean(self):
+        super()._post_clean()
+        if self.errors:
+            return
+        try:
+            self.password_hash = run_hasher(
+                make_password, self.cleaned_data['password1']
+            )
+        except HashingBusy:
+            self.add_error(None, forms.ValidationError(
+                BUSY_MESSAGE, code='busy'
+            ))
+
+    def save(self, commit=True):
+        user = super(UserCreationForm, self).save(commit=False)
+        user.password = self.password_hash
+        if commit:
+            user.save()
+        return user
+
+
+class LoginForm(AuthenticationForm):
+    def clean(self):
+        try:
+            return super().clean()
+        except HashingBusy:
+            raise forms.ValidationError(BUSY_MESSAGE, code='busy')
@@ -0,0 +1,42 @@
+"""Пул потоков для вычисления хэшей паролей.
+
+Хэш пароля — десятки миллисекунд процессора. Вход и регистрация
+считают его в небольшом пуле (PASSWORD_HASH_WORKERS потоков), так что
+при шторме входов остальные запросы не остаются без процессора. Если
+в очереди уже PASSWORD_HASH_QUEUE заданий, новое ждёт место не дольше
+PASSWORD_HASH_WAIT секунд, а затем получает отказ HashingBusy.
+В пул уходит только вычисление хэша: запросы к базе остаются в потоке
+запроса.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import BoundedSemaphore
+
+from django.conf import settings
+
+
+class HashingBusy(Exception):
+    """Очередь на вычисление хэшей переполнена."""
+
+
+@lru_cache(maxsize=None)
+def get_pool():
+    # Пул создаётся при первом обращении, уже в процессе-воркере, а не
+    # в родителе до fork.
+    return (
+        ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix='password-hash'
+        ),
+        BoundedSemaphore(settings.PASSWORD_HASH_QUEUE)
+    )
+
+
+def run_hasher(func, *args):
+    executor, slots = get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_WAIT):
+        raise HashingBusy
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password, get_hasher, make_password
+)
+from django.core.management.base import BaseCommand
+
+PASSWORD = 'correct horse battery staple'
+
+
+def timed(func, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - started) / count
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет пропускную способность входа и подбирает стоимость '
+        'хэша пароля под целевое время.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument(
+            '--threads', type=int, default=settings.PASSWORD_HASH_WORKERS
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=50,
+            help='Желаемое время одной проверки пароля.'
+        )
+
+    def handle(self, *args, **options):
+        hasher = get_hasher('default')
+        encoded = make_password(PASSWORD)
+        logins = options['logins']
+        per_login = timed(lambda: check_password(PASSWORD, encoded), logins)
+        self.stdout.write(
+            f'{hasher.algorithm}: {per_login * 1000:.1f} мс на проверку, '
+            f'{1 / per_login:.1f} входов/с на ядро'
+        )
+        threads = options['threads']
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            started = time.perf_counter()
+            list(executor.map(
+                lambda _: check_password(PASSWORD, encoded),
+                range(logins * threads)
+            ))
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{threads} потоков: {logins * threads / elapsed:.1f} входов/с'
+        )
+        scale = options['target_ms'] / 1000 / per_login
+        if hasher.algorithm == 'pbkdf2_sha256':
+            self.stdout.write('PASSWORD_PBKDF2_ITERATIONS = {}'.format(
+                max(1000, int(round(hasher.iterations * scale, -3)))
+            ))
+        elif hasher.algorithm == 'argon2':
+            self.stdout.write('PASSWORD_ARGON2_TIME_COST = {}'.format(
+                max(1, round(hasher.time_cost * scale))
+            ))
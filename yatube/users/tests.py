@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cache import (
+    FIELDS, get_cached_user, get_user_by_username, user_key, username_key
+)
+from .hashers import TunedPBKDF2PasswordHasher
+from .hashing import HashingBusy, run_hasher
+
+User = get_user_model()
+
+
+def user_queries(queries):
+    return [
+        query for query in queries.captured_queries
+        if 'FROM "auth_user"' in query['sql']
+    ]
+
+
+class CachedUserTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', password='password'
+        )
+
+    def test_request_user_from_cache(self):
+        """Повторный запрос вошедшего пользователя не читает auth_user."""
+        self.client.force_login(self.user)
+        url = reverse('about:author')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(user_queries(queries), [])
+
+    def test_cached_fields(self):
+        """В кэш попадают только нужные поля, остальные читаются лениво."""
+        User.objects.filter(pk=self.user.pk).update(email='user@example.com')
+        user = get_cached_user(self.user.pk)
+        self.assertEqual(set(cache.get(user_key(self.user.pk))), set(FIELDS))
+        self.assertNotIn('email', FIELDS)
+        self.assertEqual(user.email, 'user@example.com')
+
+    def test_invalidated_on_save(self):
+        """Сохранение пользователя сбрасывает его запись в кэше."""
+        self.assertEqual(get_cached_user(self.user.pk).first_name, '')
+        self.user.first_name = 'Имя'
+        self.user.save()
+        self.assertEqual(get_cached_user(self.user.pk).first_name, 'Имя')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля старые сессии больше не действуют."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_deactivation_logs_out(self):
+        """Заблокированный пользователь сразу теряет сессию."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        self.user.is_active = False
+        self.user.save(update_fields=('is_active',))
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_profile_lookup_by_username(self):
+        """Профиль по имени берёт автора из кэша."""
+        url = reverse('posts:profile', args=(self.user.username,))
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['author'], self.user)
+        self.assertEqual(user_queries(queries), [])
+        self.assertIsNone(get_user_by_username('nobody'))
+
+    def test_missing_username_cached(self):
+        """Несуществующее имя запоминается и не проверяется в базе снова."""
+        url = reverse('posts:profile', args=('nobody',))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(user_queries(queries), [])
+        User.objects.create_user(username='nobody')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_username_key_safe_for_memcached(self):
+        """Ключ имени из URL короткий и только из ASCII без пробелов."""
+        key = username_key('Имя с пробелом ' + 'я' * 300)
+        self.assertTrue(key.isascii())
+        self.assertNotIn(' ', key)
+        self.assertLess(len(key), 250)
+
+    def test_rename_invalidates_username(self):
+        """После переименования профиль открывается только по новому имени."""
+        self.assertEqual(get_user_by_username('user'), self.user)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertIsNone(get_user_by_username('user'))
+        self.assertEqual(get_user_by_username('renamed'), self.user)
+        feed = self.client.get(reverse('posts:profile_feed', args=('user',)))
+        self.assertEqual(feed.status_code, 404)
+
+
+class LoginTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_login_upgrades_hash(self):
+        """При входе хэш со старыми параметрами пересчитывается."""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user(
+                username='user', password='password'
+            )
+        self.assertIn('$1000$', user.password)
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.client.post(
+                reverse('users:login'),
+                {'username': 'user', 'password': 'password'}
+            )
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertIn('$2000$', user.password)
+
+    def test_failed_login_hashes_once(self):
+        """Неверный пароль и неизвестное имя стоят ровно одного хэша."""
+        User.objects.create_user(username='user', password='password')
+        encode = TunedPBKDF2PasswordHasher.encode
+        for username in ('user', 'nobody'):
+            with mock.patch.object(
+                TunedPBKDF2PasswordHasher, 'encode', autospec=True,
+                side_effect=encode
+            ) as hashed, mock.patch(
+                'users.backends.run_hasher', wraps=run_hasher
+            ) as pooled:
+                response = self.client.post(
+                    reverse('users:login'),
+                    {'username': username, 'password': 'wrong'}
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(hashed.call_count, 1)
+            self.assertEqual(pooled.call_count, 1)
+
+    def test_busy_pool(self):
+        """Переполненный пул даёт понятную ошибку вместо 500."""
+        User.objects.create_user(username='user', password='password')
+        with mock.patch(
+            'users.backends.run_hasher', side_effect=HashingBusy
+        ):
+            response = self.client.post(
+                reverse('users:login'),
+                {'username': 'user', 'password': 'password'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'слишком много входов')
+
+    def test_signup_hashes_password(self):
+        """Регистрация сохраняет хэш, посчитанный в пуле."""
+        response = self.client.post(reverse('users:signup'), {
+            'username': 'new',
+            'password1': 'Slozhnyi-parol-1',
+            'password2': 'Slozhnyi-parol-1',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            User.objects.get(username='new').check_password(
+                'Slozhnyi-parol-1'
+            )
+        )
@@ -5,6 +5,7 @@ from django.contrib.auth.views import (
 from django.urls import path
 from django.urls import reverse_lazy
 from . import views
+from .forms import LoginForm
 
 app_name = 'users'
 
@@ -17,7 +18,10 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        LoginView.as_view(
+            template_name='users/login.html',
+            authentication_form=LoginForm
+        ),
         name='login'
     ),
     path(
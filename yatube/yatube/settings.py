@@ -1,3 +1,4 @@
+import importlib.util
 import os
 
 
@@ -31,10 +32,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,6 +58,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.notifications',
             ],
         },
     },
@@ -71,6 +75,27 @@ DATABASES = {
 }
 
 
+# Стоимость хэшей подбирается командой bench_login под целевое время.
+PASSWORD_PBKDF2_ITERATIONS = 150000
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 512
+
+PASSWORD_HASHERS = [
+    'users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'users.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+# Argon2 при той же стойкости дешевле PBKDF2; становится основным,
+# если установлен argon2-cffi.
+if importlib.util.find_spec('argon2') is not None:
+    PASSWORD_HASHERS.remove('users.hashers.TunedArgon2PasswordHasher')
+    PASSWORD_HASHERS.insert(0, 'users.hashers.TunedArgon2PasswordHasher')
+
+PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+PASSWORD_HASH_QUEUE = PASSWORD_HASH_WORKERS * 8
+PASSWORD_HASH_WAIT = 2
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation'
@@ -105,6 +130,15 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+# ModelBackend остаётся для сессий, открытых до включения кэша; вход
+# паролем до него не доходит — CachedModelBackend отказывает сам.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -112,13 +146,65 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+# 'sendfile' — файлы отдаёт Django, 'x-accel' — nginx по X-Accel-Redirect,
+# 'x-sendfile' — apache/lighttpd по X-Sendfile, None — только при DEBUG.
+MEDIA_SERVE_MODE = 'sendfile'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+THUMBNAIL_PREFIX = 'cache/'
+FILE_UPLOAD_PERMISSIONS = 0o644
+
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+SITE_URL = 'http://localhost:8000'
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+
+ARCHIVE_ROOT = os.path.join(BASE_DIR, 'archive')
+ARCHIVE_AFTER_DAYS = 365
+
+RATELIMITS = {
+    'posts:post_create': {'user': '20/m', 'ip': '100/m'},
+    'posts:post_edit': {'user': '30/m', 'ip': '100/m'},
+    'posts:add_comment': {'user': '30/m', 'ip': '100/m'},
+    'posts:profile_follow': {
+        'user': '60/m', 'ip': '200/m', 'methods': ('GET', 'POST')
+    },
+    'users:signup': {'ip': '20/h'},
 }
+# За nginx: RATELIMIT_IP_HEADER = 'HTTP_X_REAL_IP' или
+# 'HTTP_X_FORWARDED_FOR'; заголовку верим только от этих адресов.
+RATELIMIT_IP_HEADER = None
+RATELIMIT_TRUSTED_PROXIES = ('127.0.0.1', '::1')
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_SAVE_EVERY_REQUEST = False
+
+TASK_QUEUE_EAGER = False
+TASK_VISIBILITY_TIMEOUT = 5 * 60
+TASK_RETRY_BASE_DELAY = 10
+
+# Сессии, пользователи, лимиты и счётчики сбрасываются в кэше одним
+# процессом, а читаются всеми, поэтому в продакшене кэш общий
+# (memcached). Кэш в памяти процесса годится только для разработки и
+# тестов: check --deploy на нём падает (core.E001).
+CACHE_LOCATION = os.environ.get('YATUBE_CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }